@@ -31,6 +31,14 @@ Qwen CLI:
   QWEN_CLI_COMMAND    - Command untuk Qwen CLI (default: qwen)
   QWEN_MODEL          - Model name (optional)
   QWEN_TIMEOUT        - Timeout dalam detik, 0=unlimited (default: 0)
+  QWEN_WORKER_COMMAND - Command worker persisten (optional, lihat _QwenWorker)
+  QWEN_POOL_SIZE      - Jumlah worker persisten paralel (default: 3)
+
+Streaming:
+  LLM_STATUS_BATCH    - Maks baris per status update, 1=per baris (default: 16)
+
+Workflow:
+  SATGAS_CHECKPOINT   - 1 = aktifkan MemorySaver checkpointer untuk resume/replay (default: off)
 
 OpenAI API:
   OPENAI_API_KEY      - API key (required untuk openai provider)
@@ -38,6 +46,8 @@ OpenAI API:
   OPENAI_TEMPERATURE  - Creativity 0.0-2.0 (default: 0.7)
   OPENAI_MAX_TOKENS   - Max tokens (default: 4096)
   OPENAI_BASE_URL     - Custom endpoint (optional)
+  OPENAI_STREAM_USAGE - 1 = minta usage di stream untuk laporan prompt cache
+                        (default: on tanpa OPENAI_BASE_URL, off untuk custom endpoint)
 
 """
 
@@ -68,6 +78,7 @@ PROJECTS_DIR = BASE_DIR / "projects"
 # Pilih provider: "qwen" (local CLI) atau "openai" (API)
 
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "qwen")
+LLM_STATUS_BATCH = int(os.getenv("LLM_STATUS_BATCH", "16"))  # Lines per streamed status update
 
 # -----------------------------------------------------------------------------
 # Qwen CLI Settings
@@ -77,6 +88,8 @@ LLM_PROVIDER = os.getenv("LLM_PROVIDER", "qwen")
 QWEN_CLI_COMMAND = os.getenv("QWEN_CLI_COMMAND", "qwen")
 QWEN_MODEL = os.getenv("QWEN_MODEL")
 QWEN_TIMEOUT = int(os.getenv("QWEN_TIMEOUT", "0"))  # 0 = wait indefinitely
+QWEN_WORKER_COMMAND = os.getenv("QWEN_WORKER_COMMAND")  # Persistent worker, None = spawn per invoke
+QWEN_POOL_SIZE = int(os.getenv("QWEN_POOL_SIZE", "3"))  # Max concurrent persistent workers
 
 # -----------------------------------------------------------------------------
 # OpenAI API Settings
@@ -88,6 +101,9 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "4096"))
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # For Azure, Together AI, etc.
+OPENAI_STREAM_USAGE = os.getenv(
+    "OPENAI_STREAM_USAGE", "" if OPENAI_BASE_URL else "1"
+).strip().lower() in ("1", "true", "yes")
 
 # =============================================================================
 # TECH STACK CONFIGURATION
@@ -816,11 +832,14 @@ class Settings:
 
     # LLM Provider
     LLM_PROVIDER = LLM_PROVIDER
+    LLM_STATUS_BATCH = LLM_STATUS_BATCH
 
     # Qwen Settings
     QWEN_CLI_COMMAND = QWEN_CLI_COMMAND
     QWEN_MODEL = QWEN_MODEL
     QWEN_TIMEOUT = QWEN_TIMEOUT
+    QWEN_WORKER_COMMAND = QWEN_WORKER_COMMAND
+    QWEN_POOL_SIZE = QWEN_POOL_SIZE
 
     # OpenAI Settings
     OPENAI_API_KEY = OPENAI_API_KEY
@@ -828,6 +847,7 @@ class Settings:
     OPENAI_TEMPERATURE = OPENAI_TEMPERATURE
     OPENAI_MAX_TOKENS = OPENAI_MAX_TOKENS
     OPENAI_BASE_URL = OPENAI_BASE_URL
+    OPENAI_STREAM_USAGE = OPENAI_STREAM_USAGE
 
     # Agent & File Config
     AGENTS_CONFIG = AGENTS_CONFIG
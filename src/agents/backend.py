@@ -16,6 +16,7 @@ Untuk menambah dukungan tech stack baru:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 from config.settings import BACKEND_STACKS
@@ -186,9 +187,12 @@ SEBELUM SELESAI: Periksa kembali semua checklist di atas!"""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = BackendAgent()
+@functools.cache
+def _get_agent() -> BackendAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return BackendAgent()
 
 
 def backend_engineer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
@@ -80,20 +80,27 @@ TIPS:
 -----
 
 - Gunakan FILE_FORMAT_INSTRUCTIONS di prompt untuk konsistensi format file output
+- Gunakan build_cached_prompt() agar blok instruksi statis bisa di-cache provider
 - Selalu validasi required_fields sebelum build_prompt
 - Gunakan state.get(key, "") untuk akses aman ke state
 - Agent yang di-skip bisa return state langsung tanpa memanggil LLM
 
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Any, Dict, Optional
+from typing import List, Tuple, Any, Dict, Optional, Union
 from langchain_core.messages import HumanMessage
 
-from ..core.llm import llm
+from ..core.llm import get_llm
 from .prompts import FILE_FORMAT_INSTRUCTIONS
 
 
+# Prompt bisa berupa string biasa atau list content blocks
+# (format {"type": "text", "text": ...} seperti Anthropic/LangChain)
+Prompt = Union[str, List[Dict[str, Any]]]
+
+
 class BaseAgent(ABC):
     """
     Base class untuk semua agent dalam SATGAS framework.
@@ -152,7 +159,7 @@ class BaseAgent(ABC):
     # =========================================================================
 
     @abstractmethod
-    def build_prompt(self, state: Dict[str, Any]) -> str:
+    def build_prompt(self, state: Dict[str, Any]) -> Prompt:
         """
         Bangun prompt untuk dikirim ke LLM.
 
@@ -160,7 +167,7 @@ class BaseAgent(ABC):
             state: State dictionary dari workflow
 
         Returns:
-            String prompt yang akan dikirim ke LLM
+            String prompt, atau list content blocks dari build_cached_prompt()
 
         Contoh implementasi:
             def build_prompt(self, state):
@@ -222,9 +229,6 @@ class BaseAgent(ABC):
         # Validasi required fields
         self._check_required_fields(state)
 
-        # Set current agent untuk logging
-        llm.set_current_agent(self.display_name or self.agent_name)
-
         # Save original state values to detect changes
         original_state = {k: v for k, v in state.items()}
 
@@ -232,7 +236,7 @@ class BaseAgent(ABC):
         prompt = self.build_prompt(state)
 
         # Call LLM
-        response = llm.invoke([HumanMessage(content=prompt)])
+        response = self._invoke_llm(prompt)
 
         # Process response dan update state
         updated_state = self.process_response(state, response)
@@ -251,6 +255,29 @@ class BaseAgent(ABC):
 
         return modified
 
+    async def aexecute(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Versi async dari execute() untuk pipeline berbasis event loop.
+
+        execute() dijalankan utuh di worker thread, sehingga event loop tetap
+        bebas melayani I/O agent lain dan subclass yang meng-override
+        execute() tetap dipakai di jalur async.
+
+        Args:
+            state: State dictionary dari workflow
+
+        Returns:
+            Dictionary containing ONLY the modified keys
+        """
+        return await asyncio.to_thread(self.execute, state)
+
+    def _invoke_llm(self, prompt: Prompt) -> Any:
+        """Kirim prompt ke LLM dari thread saat ini."""
+        # current_agent disimpan per thread, jadi set di thread yang memanggil LLM
+        llm = get_llm()
+        llm.set_current_agent(self.display_name or self.agent_name)
+        return llm.invoke([HumanMessage(content=prompt)])
+
     def _check_required_fields(self, state: Dict[str, Any]):
         """
         Validasi bahwa semua required_fields ada di state.
@@ -281,6 +308,32 @@ class BaseAgent(ABC):
         """
         return FILE_FORMAT_INSTRUCTIONS
 
+    def build_cached_prompt(self, head: str, tail: str) -> List[Dict[str, Any]]:
+        """
+        Susun prompt sebagai content blocks dengan breakpoint cache_control.
+
+        Urutan blok: bagian statis agent (head), instruksi format file
+        yang ditandai cache_control, lalu bagian dinamis dari state (tail).
+        Provider hanya bisa me-reuse cache untuk prefix yang identik,
+        jadi head JANGAN berisi data dari state.
+
+        Args:
+            head: Instruksi statis agent (role, tugas, aturan)
+            tail: Bagian dinamis (spec, code excerpt, dll)
+
+        Returns:
+            List content blocks untuk HumanMessage
+        """
+        return [
+            {"type": "text", "text": head},
+            {
+                "type": "text",
+                "text": self.get_file_format_instructions(),
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": tail},
+        ]
+
     def skip_execution(self, state: Dict[str, Any], reason: str = "") -> Dict[str, Any]:
         """
         Skip eksekusi agent dan return empty dict (no modifications).
@@ -299,6 +352,7 @@ class BaseAgent(ABC):
             Empty dict (no modifications to state)
         """
         if reason:
+            llm = get_llm()
             llm.set_current_agent(self.display_name or self.agent_name)
             llm._notify_status(f">>> Skipped: {reason}")
         # Return empty dict - no modifications for parallel execution support
@@ -17,6 +17,7 @@ Untuk menambah dukungan tech stack baru:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 from config.settings import BACKEND_STACKS, FRONTEND_STACKS, DATABASE_STACKS
@@ -372,9 +373,12 @@ Generate setiap file secara lengkap dengan INDENTASI YANG BENAR."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = DevOpsAgent()
+@functools.cache
+def _get_agent() -> DevOpsAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return DevOpsAgent()
 
 
 def devops_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
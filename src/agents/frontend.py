@@ -16,6 +16,7 @@ Untuk menambah dukungan framework baru:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 from config.settings import FRONTEND_STACKS
@@ -121,9 +122,12 @@ Generate setiap file secara lengkap dan siap dijalankan."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = FrontendAgent()
+@functools.cache
+def _get_agent() -> FrontendAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return FrontendAgent()
 
 
 def frontend_engineer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
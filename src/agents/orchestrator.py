@@ -23,6 +23,7 @@ Tech stack yang didukung dikonfigurasi di config/settings.py:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 from config.settings import format_tech_stack_list
@@ -131,10 +132,12 @@ Generate file dengan lengkap."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-# Instance global untuk digunakan langsung
-_agent = OrchestratorAgent()
+@functools.cache
+def _get_agent() -> OrchestratorAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return OrchestratorAgent()
 
 
 def orchestrator_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
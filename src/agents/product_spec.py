@@ -17,6 +17,7 @@ Untuk mengubah format spesifikasi:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 
@@ -138,9 +139,12 @@ Generate kedua file dengan lengkap."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = ProductSpecAgent()
+@functools.cache
+def _get_agent() -> ProductSpecAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return ProductSpecAgent()
 
 
 def product_spec_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
@@ -17,6 +17,7 @@ Untuk menambah review criteria:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 
@@ -116,9 +117,12 @@ Generate file dengan lengkap."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = QAAgent()
+@functools.cache
+def _get_agent() -> QAAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return QAAgent()
 
 
 def qa_critic_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
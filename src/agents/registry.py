@@ -66,7 +66,7 @@ ARSITEKTUR:
 
 """
 
-from typing import List, Type, Dict, Any, Callable
+from typing import List, Tuple, Type, Dict, Any, Callable
 from .base import BaseAgent
 
 
@@ -155,6 +155,12 @@ class AgentRegistry:
         # Urutkan berdasarkan step_order
         self._agents.sort(key=lambda a: a.step_order)
 
+        # Agent list tidak berubah setelah init, jadi edges cukup dihitung sekali.
+        # Disimpan sebagai tuple agar pemanggil tidak bisa mengubahnya.
+        self._edges: Tuple[Tuple[str, str], ...] = tuple(
+            (a.agent_id, b.agent_id) for a, b in zip(self._agents, self._agents[1:])
+        )
+
     # =========================================================================
     # GETTERS
     # =========================================================================
@@ -212,17 +218,14 @@ class AgentRegistry:
         """
         return {agent.agent_id: agent for agent in self._agents}
 
-    def get_workflow_edges(self) -> List[tuple]:
+    def get_workflow_edges(self) -> Tuple[Tuple[str, str], ...]:
         """
-        Dapatkan list edge tuples untuk sequential workflow.
+        Dapatkan edge tuples untuk sequential workflow.
 
         Returns:
-            List of (from_id, to_id) tuples
+            Tuple of (from_id, to_id) tuples (read-only)
         """
-        edges = []
-        for i in range(len(self._agents) - 1):
-            edges.append((self._agents[i].agent_id, self._agents[i + 1].agent_id))
-        return edges
+        return self._edges
 
     def get_entry_point(self) -> str:
         """
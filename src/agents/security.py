@@ -17,6 +17,7 @@ Untuk menambah security check:
 
 """
 
+import functools
 from typing import Dict, Any
 from .base import BaseAgent
 
@@ -131,9 +132,12 @@ Generate setiap file secara lengkap."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = SecurityAgent()
+@functools.cache
+def _get_agent() -> SecurityAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return SecurityAgent()
 
 
 def security_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
@@ -11,14 +11,136 @@ CUSTOMIZATION:
 --------------
 
 Untuk menambah dukungan testing framework baru:
-1. Tambahkan mapping framework di build_prompt()
+1. Tambahkan mapping framework di BACKEND_TEST_FRAMEWORKS / FRONTEND_TEST_FRAMEWORKS
+   dengan key yang sama seperti BACKEND_STACKS / FRONTEND_STACKS di config/settings.py
+   (deteksi stack memakai nama dan key dari sana)
 2. Tambahkan struktur file test yang sesuai
 3. Override process_response() jika perlu parsing khusus
 
 """
 
-from typing import Dict, Any
+import functools
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseAgent
+from config.settings import BACKEND_STACKS, FRONTEND_STACKS
+from ..utils.helpers import code_skeleton
+
+
+# =============================================================================
+# TESTING FRAMEWORK MAPPING
+# =============================================================================
+# Key tech stack (sama dengan config/settings.py) -> baris mapping testing framework.
+# Hanya baris yang cocok dengan spec yang dikirim ke LLM.
+
+BACKEND_TEST_FRAMEWORKS = {
+    "express": "Node.js/Express -> Jest atau Mocha",
+    "fastapi": "Python/FastAPI/Django -> pytest",
+    "django": "Python/FastAPI/Django -> pytest",
+    "laravel": "PHP/Laravel -> PHPUnit",
+    "gin": "Go/Gin -> Go testing package",
+    "rails": "Ruby/Rails -> RSpec",
+    "spring": "Java/Spring -> JUnit",
+    "flask": "Python/Flask -> pytest",
+    "nestjs": "NestJS -> Jest + @nestjs/testing",
+    "hapi": "Node.js/Hapi -> Lab atau Jest",
+    "koa": "Node.js/Koa -> Jest + Supertest",
+}
+
+FRONTEND_TEST_FRAMEWORKS = {
+    "react": "React -> Jest + React Testing Library",
+    "vue": "Vue -> Vitest atau Jest + Vue Test Utils",
+    "angular": "Angular -> Jasmine + Karma",
+    "svelte": "Svelte -> Jest + Svelte Testing Library",
+    "nextjs": "Next.js -> Jest + React Testing Library",
+    "nuxt": "Nuxt -> Vitest + @nuxt/test-utils",
+    "blade": "Blade (Laravel) -> PHPUnit + Laravel Dusk",
+    "ejs": "EJS -> Jest + Supertest (render view)",
+    "thymeleaf": "Thymeleaf -> JUnit + Spring MockMvc",
+}
+
+E2E_TEST_FRAMEWORKS = "Playwright, Cypress, atau Selenium"
+
+# Key dependency di manifest, mis. "express": "^4.18" di package.json
+_MANIFEST_KEY = r"(?i:[\"']{}[\"']\s*:)"
+
+# Keterangan dalam kurung di nama: "Gin (Go)" -> "Gin"
+_NAME_QUALIFIER_RE = re.compile(r"\s*\(.*\)$")
+
+
+def _stack_alternatives(key: str, name: str) -> List[str]:
+    """
+    Pola deteksi satu stack dari key dan nama display di config/settings.py.
+
+    Nama yang khas (ada spasi, titik, atau kurung: "Express.js",
+    "Spring Boot") cocok tanpa peduli huruf besar/kecil. Nama satu kata
+    ("React", "Svelte", "Gin") hanya cocok dengan kapitalisasi seperti di
+    config, supaya kata umum ("react to", "in spring") tidak terdeteksi.
+    """
+    distinctive = not name.isalnum()
+    alternatives = [rf"(?i:{re.escape(name)})" if distinctive else re.escape(name)]
+    short = _NAME_QUALIFIER_RE.sub("", name)
+    if short != name:
+        alternatives.append(re.escape(short))
+    alternatives.append(_MANIFEST_KEY.format(re.escape(key)))
+    return alternatives
+
+
+def _compile_stack_patterns(stacks: Dict[str, Dict[str, Any]]) -> "re.Pattern[str]":
+    """Gabungkan pola semua stack jadi satu regex; nama group = key (lihat lastgroup)."""
+    groups = [
+        f"(?P<{key}>{'|'.join(_stack_alternatives(key, stack['name']))})"
+        for key, stack in stacks.items()
+    ]
+    # Batas kata manual: nama bisa diawali/diakhiri titik atau kurung
+    return re.compile(rf"(?<![\w.])(?:{'|'.join(groups)})(?![\w])")
+
+
+_BACKEND_RE = _compile_stack_patterns(BACKEND_STACKS)
+_FRONTEND_RE = _compile_stack_patterns(FRONTEND_STACKS)
+
+# Fallback untuk stack yang tidak dikenali: tampilkan semua mapping
+_ALL_BACKEND_LINES = tuple(dict.fromkeys(BACKEND_TEST_FRAMEWORKS.values()))
+_ALL_FRONTEND_LINES = tuple(FRONTEND_TEST_FRAMEWORKS.values())
+
+
+def _detect_stack(spec: str) -> Tuple[Optional[str], Optional[str]]:
+    """Deteksi framework backend dan frontend pertama yang muncul di spec."""
+    backend = _BACKEND_RE.search(spec)
+    frontend = _FRONTEND_RE.search(spec)
+    return (
+        backend.lastgroup if backend else None,
+        frontend.lastgroup if frontend else None,
+    )
+
+
+def _format_test_frameworks(spec: str) -> str:
+    """Format mapping testing framework, hanya untuk stack yang terdeteksi."""
+    return _format_frameworks_for(*_detect_stack(spec))
+
+
+@functools.lru_cache(maxsize=64)
+def _format_frameworks_for(backend: Optional[str], frontend: Optional[str]) -> str:
+    """Fragment mapping testing framework, di-cache per kombinasi stack."""
+    backend_lines = (BACKEND_TEST_FRAMEWORKS[backend],) if backend else _ALL_BACKEND_LINES
+    frontend_lines = (FRONTEND_TEST_FRAMEWORKS[frontend],) if frontend else _ALL_FRONTEND_LINES
+
+    lines = ["Backend Testing:"]
+    lines.extend(f"- {line}" for line in backend_lines)
+    lines.append("\nFrontend Testing:")
+    lines.extend(f"- {line}" for line in frontend_lines)
+    lines.append(f"\nE2E Testing:\n- {E2E_TEST_FRAMEWORKS}")
+    return "\n".join(lines)
+
+
+# Bagian statis prompt - identik untuk setiap run sehingga bisa di-cache
+# bersama FILE_FORMAT_INSTRUCTIONS oleh provider LLM
+TEST_PROMPT_HEAD = """Kamu adalah Test Engineer Agent.
+
+TUGAS: Buat test suites lengkap sesuai tech stack di spesifikasi.
+
+STRUKTUR FILE TEST:
+Buat file test sesuai konvensi framework yang digunakan."""
 
 
 class TestAgent(BaseAgent):
@@ -55,63 +177,42 @@ class TestAgent(BaseAgent):
     # PROMPT BUILDING
     # =========================================================================
 
-    def build_prompt(self, state: Dict[str, Any]) -> str:
+    def build_prompt(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Bangun prompt untuk membuat test suites.
 
         Prompt ini berisi:
-        1. Spec dan acceptance criteria
-        2. Backend dan frontend code (excerpt)
-        3. Mapping testing framework per tech stack
+        1. Instruksi statis agent
+        2. Instruksi format file (ditandai cache_control)
+        3. Spec, acceptance criteria, code skeleton, dan testing framework
+           untuk tech stack yang terdeteksi (dinamis)
         """
-        spec = state.get("spec", "")[:1000]
+        full_spec = state.get("spec", "")
+        spec = full_spec[:1000]
         acceptance = state.get("acceptance_tests", "")[:1000]
-        backend = state.get("backend_code", "")[:1500]
-        frontend = state.get("frontend_code", "")[:1500]
+        # Skeleton (signature saja) lebih padat daripada potongan raw source
+        backend = code_skeleton(state.get("backend_code", ""), 1500)
+        frontend = code_skeleton(state.get("frontend_code", ""), 1500)
 
-        return f"""Kamu adalah Test Engineer Agent.
-
-TUGAS: Buat test suites lengkap sesuai tech stack di spesifikasi.
-
-SPESIFIKASI:
+        tail = f"""SPESIFIKASI:
 {spec}
 
 ACCEPTANCE CRITERIA:
 {acceptance}
 
-BACKEND CODE (excerpt):
+BACKEND CODE (skeleton):
 {backend}
 
-FRONTEND CODE (excerpt):
+FRONTEND CODE (skeleton):
 {frontend}
 
-LANGKAH PERTAMA - BACA TECH STACK:
-Lihat spesifikasi untuk menentukan testing framework yang sesuai:
-
-Backend Testing:
-- Node.js/Express -> Jest atau Mocha
-- Python/FastAPI/Django -> pytest
-- PHP/Laravel -> PHPUnit
-- Go/Gin -> Go testing package
-- Ruby/Rails -> RSpec
-- Java/Spring -> JUnit
-
-Frontend Testing:
-- React -> Jest + React Testing Library
-- Vue -> Vitest atau Jest + Vue Test Utils
-- Angular -> Jasmine + Karma
-- Svelte -> Jest + Svelte Testing Library
-
-E2E Testing:
-- Playwright, Cypress, atau Selenium
-
-STRUKTUR FILE TEST:
-Buat file test sesuai konvensi framework yang digunakan.
-
-{self.get_file_format_instructions()}
+TESTING FRAMEWORK (sesuai tech stack di spesifikasi):
+{_format_test_frameworks(full_spec)}
 
 Generate setiap file test secara lengkap dan bisa dijalankan."""
 
+        return self.build_cached_prompt(TEST_PROMPT_HEAD, tail)
+
     # =========================================================================
     # RESPONSE PROCESSING
     # =========================================================================
@@ -131,9 +232,12 @@ Generate setiap file test secara lengkap dan bisa dijalankan."""
 # LEGACY FUNCTION (untuk backward compatibility)
 # =============================================================================
 
-_agent = TestAgent()
+@functools.cache
+def _get_agent() -> TestAgent:
+    """Instance dibuat saat pertama dipakai, bukan saat module di-import."""
+    return TestAgent()
 
 
 def test_engineer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """Legacy function wrapper untuk backward compatibility."""
-    return _agent.execute(state)
+    return _get_agent().execute(state)
@@ -1,443 +1,196 @@
 """SATGAS - Streamlit UI."""
+import asyncio
 import base64
+import queue
 import re
 import sys
 import threading
+import time
 import uuid
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Callable
+from types import MappingProxyType
+from typing import Deque, Dict, Callable
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
-from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from config.settings import SETTINGS
-from src.core import AppGenerationState, app as graph_app, llm
+from src.core import AppGenerationState, get_app, get_llm
 from src.core.state import create_initial_state
 from src.utils.helpers import sanitize_for_output, format_exception, slugify, StreamingFileSaver
 from src.utils.formatters import format_project, check_formatters_available
 
-# Thread-safe lock for UI updates during parallel execution
-_ui_lock = threading.RLock()  # Use RLock to allow re-entrant locking
+# UI updates from worker threads are queued here and applied by the script
+# thread, so parallel agents never wait on each other to touch the UI
+_ui_queue: "queue.SimpleQueue[tuple[Callable, tuple, dict]]" = queue.SimpleQueue()
+
+# How often the script thread drains the UI queue while the pipeline runs
+UI_DRAIN_INTERVAL = 0.05
 
 
 def _get_thread_safe_callback(callback: Callable) -> Callable:
     """
     Wrap a callback to be thread-safe for Streamlit.
 
-    This captures the main thread's ScriptRunContext and applies it
-    when the callback is executed from a worker thread (e.g., during
-    parallel agent execution in LangGraph).
+    Worker threads (e.g., parallel agent execution in LangGraph) only
+    enqueue the call; _drain_ui_queue() runs it later on the script
+    thread, which owns the ScriptRunContext. Enqueueing never blocks.
     """
-    ctx = get_script_run_ctx()
-
     def wrapped(*args, **kwargs):
-        # Add the captured context to the current thread
-        if ctx is not None:
-            try:
-                add_script_run_ctx(threading.current_thread(), ctx)
-            except Exception:
-                pass  # Ignore context errors
-
-        # Try to acquire lock with timeout to prevent blocking
-        acquired = _ui_lock.acquire(blocking=True, timeout=1.0)
-        if not acquired:
-            # If lock not available, skip UI update but continue execution
-            return None
+        _ui_queue.put((callback, args, kwargs))
+
+    return wrapped
+
 
+def _drain_ui_queue() -> None:
+    """Apply all queued UI updates in order on the script thread."""
+    while True:
         try:
-            return callback(*args, **kwargs)
+            callback, args, kwargs = _ui_queue.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            callback(*args, **kwargs)
         except Exception:
             # If UI update fails, still continue execution
             pass
-        finally:
-            _ui_lock.release()
 
-    return wrapped
+
+def _run_with_ui_drain(func: Callable, *args, cancel: threading.Event | None = None, **kwargs):
+    """
+    Run func in a worker thread while the script thread drains UI updates.
+
+    Returns func's result, or re-raises its exception. ``cancel`` is set
+    when this returns or is interrupted (Streamlit rerun/stop raise on the
+    script thread), so a worker that checks it stops instead of running on.
+    """
+    outcome: dict = {}
+
+    def target():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    worker = threading.Thread(target=target, name="satgas-pipeline", daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(timeout=UI_DRAIN_INTERVAL)
+            _drain_ui_queue()
+            _flush_pending_ui()
+        _drain_ui_queue()
+    finally:
+        if cancel is not None:
+            cancel.set()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
 
 
 # Logo path
 LOGO_PATH = Path(__file__).parent.parent / "assets" / "satgas-logo.png"
+THEME_CSS_PATH = Path(__file__).parent.parent / "assets" / "theme.css"
+
+# Read size for logo encoding; must be a multiple of 3 for base64 chunking
+_LOGO_READ_CHUNK = 3 * 16 * 1024
 
 
+@st.cache_data(show_spinner=False)
 def get_logo_base64() -> str:
-    """Get logo as base64 string for HTML embedding."""
+    """Get logo as base64 string for HTML embedding (cached across reruns).
+
+    Encodes in 3-byte-aligned blocks so no block produces '=' padding
+    mid-stream and the raw PNG is never held in memory all at once.
+    """
     if LOGO_PATH.exists():
+        chunks = []
         with open(LOGO_PATH, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+            for block in iter(lambda: f.read(_LOGO_READ_CHUNK), b""):
+                chunks.append(base64.b64encode(block))
+        return b"".join(chunks).decode("ascii")
     return ""
 
 
-# Agent name mapping from LLM to config
-AGENT_NAME_MAP = {
-    "Orchestrator": "orchestrator",
-    "Product & Spec": "product_spec",
-    "Backend Engineer": "backend",
-    "Frontend Engineer": "frontend",
-    "Test Engineer": "test",
-    "Security": "security",
-    "QA Critic": "qa",
-    "DevOps": "devops",
-}
-
-# Page config with logo as favicon
-st.set_page_config(
-    page_title="SATGAS",
-    page_icon=str(LOGO_PATH) if LOGO_PATH.exists() else "S",
-    layout="wide"
-)
-
-# Custom CSS with Tactical Theme
-st.markdown("""
-<style>
-/* ===========================================
-   SATGAS COLOR PALETTE (Tactical Theme)
-   ===========================================
-   Primary 01 — Tactical Green: #4BA91C
-   Primary 02 — Deep Tactical Green: #356D21
-   Secondary 01 — Gunmetal: #30353A
-   Secondary 02 — Charcoal: #252A2F
-   Accent 01 — Neon Vision Green: #6BE31E
-   Accent 02 — Lime Highlight: #A7E55B
-   Neutral 01 — Off White: #E0E8E6
-   Neutral 02 — Steel Gray: #9EA7A6
-   Neutral 03 — Light Gray: #BCC1C3
-   Stroke 01 — Dark Outline: #1C1F23
-   BG Dark 01: #252A2F
-   BG Dark 02: #1C1F23
-   =========================================== */
-
-/* Main container */
-.main .block-container {
-    padding-top: 2rem;
-    max-width: 1200px;
-}
-
-/* Header styling */
-.app-header {
-    background: linear-gradient(135deg, #1C1F23 0%, #252A2F 50%, #30353A 100%);
-    padding: 1.5rem 2rem;
-    border-radius: 8px;
-    margin-bottom: 1.5rem;
-    color: #E0E8E6;
-    display: flex;
-    align-items: center;
-    gap: 1.5rem;
-    border: 1px solid #30353A;
-    box-shadow: 0 4px 20px rgba(28, 31, 35, 0.5);
-}
-.app-header .logo {
-    width: 64px;
-    height: 64px;
-    border-radius: 12px;
-    object-fit: contain;
-    background: rgba(75, 169, 28, 0.15);
-    padding: 8px;
-    border: 1px solid #4BA91C;
-}
-.app-header .header-text h1 {
-    margin: 0;
-    font-size: 1.8rem;
-    font-weight: 600;
-    letter-spacing: 0.5px;
-    color: #6BE31E;
-    text-shadow: 0 0 10px rgba(107, 227, 30, 0.3);
-}
-.app-header .header-text p {
-    margin: 0.5rem 0 0 0;
-    color: #9EA7A6;
-    font-size: 0.9rem;
-}
+@st.cache_resource(show_spinner=False)
+def _theme_style_tag() -> str:
+    """Read the Tactical Theme stylesheet once per server process."""
+    return f"<style>\n{THEME_CSS_PATH.read_text(encoding='utf-8')}</style>"
 
-/* Agent step badges */
-.step-badge {
-    display: inline-flex;
-    align-items: center;
-    justify-content: center;
-    width: 24px;
-    height: 24px;
-    border-radius: 50%;
-    background: #30353A;
-    color: #9EA7A6;
-    font-size: 0.75rem;
-    font-weight: 600;
-    margin-right: 8px;
-    border: 1px solid #30353A;
-}
-.step-badge.active {
-    background: #6BE31E;
-    color: #1C1F23;
-    border-color: #6BE31E;
-    box-shadow: 0 0 8px rgba(107, 227, 30, 0.5);
-}
-.step-badge.completed {
-    background: #4BA91C;
-    color: #1C1F23;
-    border-color: #356D21;
-}
 
-/* Pipeline visualization */
-.pipeline-container {
-    display: flex;
-    align-items: center;
-    justify-content: space-between;
-    padding: 1rem 0;
-    overflow-x: auto;
-}
-.pipeline-step {
-    display: flex;
-    flex-direction: column;
-    align-items: center;
-    min-width: 80px;
-    position: relative;
-}
-.pipeline-step .step-num {
-    width: 32px;
-    height: 32px;
-    border-radius: 50%;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-weight: 600;
-    font-size: 0.85rem;
-    margin-bottom: 6px;
-    transition: all 0.3s ease;
-    border: 2px solid #30353A;
-}
-.pipeline-step .step-name {
-    font-size: 0.7rem;
-    text-align: center;
-    color: #9EA7A6;
-    max-width: 70px;
-}
-.pipeline-connector {
-    flex: 1;
-    height: 2px;
-    background: linear-gradient(90deg, #356D21, #4BA91C);
-    margin: 0 4px;
-    margin-bottom: 20px;
-}
+# Flattened agent config, built once: (id, step, name, description, color, outputs)
+_AGENTS = tuple(
+    (a["id"], a["step"], a["name"], a["description"], a["color"], tuple(a["outputs"]))
+    for a in SETTINGS.AGENTS_CONFIG
+)
 
-/* Status cards */
-.status-card {
-    padding: 8px 12px;
-    margin: 4px 0;
-    border-radius: 6px;
-    font-size: 0.85rem;
-    display: flex;
-    align-items: center;
-    gap: 8px;
-    border: 1px solid #30353A;
-}
-.status-card.running {
-    background: linear-gradient(135deg, #4BA91C 0%, #6BE31E 100%);
-    border-left: 3px solid #A7E55B;
-    color: #1C1F23;
-    font-weight: 500;
-}
-.status-card.running b {
-    color: #1C1F23;
-}
-.status-card.completed {
-    background: linear-gradient(135deg, #252A2F 0%, #30353A 100%);
-    border-left: 3px solid #4BA91C;
-    color: #A7E55B;
-}
-.status-card.pending {
-    background: #252A2F;
-    color: #9EA7A6;
-}
+# Agent name mapping from LLM to config (read-only; looked up once per streamed line)
+AGENT_NAME_MAP = MappingProxyType({
+    sys.intern(name): agent_id for name, agent_id in {
+        "Orchestrator": "orchestrator",
+        "Product & Spec": "product_spec",
+        "Backend Engineer": "backend",
+        "Frontend Engineer": "frontend",
+        "Test Engineer": "test",
+        "Security": "security",
+        "QA Critic": "qa",
+        "DevOps": "devops",
+    }.items()
+})
 
-/* File list */
-.file-item {
-    padding: 4px 8px;
-    font-size: 0.8rem;
-    font-family: monospace;
-    color: #1A1D21;
-    background: rgba(75, 169, 28, 0.25);
-    border-radius: 4px;
-    margin: 2px 0;
-    border-left: 2px solid #4BA91C;
-}
-.files-more {
-    color: #3A4A48;
-    font-size: 0.75rem;
-    padding: 4px 8px;
-}
-.files-total {
-    margin-top: 8px;
-    font-weight: 600;
-    font-size: 0.85rem;
-    color: #2D7A10;
-}
-.files-empty {
-    color: #3A4A48;
-    font-size: 0.85rem;
-}
+# Agent prefix on streamed lines, e.g. "[Backend Engineer] ..."
+_AGENT_PREFIX_RE = re.compile(r'\[([^\]]+)\]')
+_AGENT_PREFIX_STRIP_RE = re.compile(r'^\[[^\]]+\]\s*')
 
-/* Expander styling */
-.stExpander {
-    border: 1px solid #30353A !important;
-    border-radius: 8px !important;
-    margin-bottom: 8px;
-    background: #252A2F !important;
-}
-.stExpander > details {
-    background: #252A2F !important;
-}
-.stExpander > details > summary {
-    color: #E0E8E6 !important;
-    background: #30353A !important;
-    padding: 0.75rem 1rem !important;
-    border-radius: 8px !important;
-}
-.stExpander > details > summary:hover {
-    background: #3A4045 !important;
-    color: #6BE31E !important;
-}
-.stExpander > details > summary > span {
-    color: #E0E8E6 !important;
-}
-.stExpander > details > summary > span p {
-    color: #E0E8E6 !important;
-    font-weight: 500;
-}
-.stExpander > details[open] > summary {
-    background: linear-gradient(135deg, #356D21 0%, #4BA91C 100%) !important;
-    color: #1C1F23 !important;
-    border-bottom-left-radius: 0 !important;
-    border-bottom-right-radius: 0 !important;
-}
-.stExpander > details[open] > summary > span,
-.stExpander > details[open] > summary > span p {
-    color: #1C1F23 !important;
-}
-/* Expander arrow icon */
-.stExpander > details > summary svg {
-    color: #9EA7A6 !important;
-}
-.stExpander > details[open] > summary svg {
-    color: #1C1F23 !important;
-}
 
-/* Metrics */
-.metric-card {
-    background: linear-gradient(135deg, #252A2F 0%, #30353A 100%);
-    padding: 1rem;
-    border-radius: 8px;
-    text-align: center;
-    border: 1px solid #30353A;
-}
-.metric-value {
-    font-size: 1.5rem;
-    font-weight: 600;
-    color: #6BE31E;
-}
-.metric-label {
-    font-size: 0.8rem;
-    color: #9EA7A6;
-}
+@st.cache_resource(show_spinner=False)
+def _logo_exists() -> bool:
+    """Check for the logo file once per server process, not on every rerun."""
+    return LOGO_PATH.exists()
 
-/* Footer */
-.app-footer {
-    text-align: center;
-    padding: 1rem;
-    color: #9EA7A6;
-    font-size: 0.8rem;
-    border-top: 1px solid #30353A;
-    margin-top: 2rem;
-}
-.app-footer a {
-    color: #9EA7A6 !important;
-    text-decoration: underline;
-}
-.app-footer a:hover {
-    color: #BCC1C3 !important;
-}
 
-/* How to use box */
-.how-to-box {
-    background: linear-gradient(135deg, #252A2F 0%, #30353A 100%);
-    border: 1px solid #30353A;
-    border-radius: 8px;
-    padding: 1rem 1.5rem;
-    margin-bottom: 1.5rem;
-    box-shadow: 0 2px 10px rgba(28, 31, 35, 0.3);
-}
-.how-to-box h4 {
-    margin: 0 0 0.75rem 0;
-    color: #6BE31E;
-    font-size: 1rem;
-}
-.how-to-box ol {
-    margin: 0;
-    padding-left: 1.25rem;
-    color: #E0E8E6;
-}
-.how-to-box li {
-    margin-bottom: 0.5rem;
-    font-size: 0.9rem;
-    color: #BCC1C3;
-}
-.how-to-box code {
-    background: #1C1F23;
-    color: #A7E55B;
-    padding: 2px 6px;
-    border-radius: 4px;
-    font-size: 0.85rem;
-    border: 1px solid #30353A;
-}
+# Page config with logo as favicon
+st.set_page_config(
+    page_title="SATGAS",
+    page_icon=str(LOGO_PATH) if _logo_exists() else "S",
+    layout="wide"
+)
 
-/* Output location box */
-.output-box {
-    background: linear-gradient(135deg, #4BA91C 0%, #6BE31E 100%);
-    border: 1px solid #A7E55B;
-    border-radius: 8px;
-    padding: 1rem 1.5rem;
-    margin: 1rem 0;
-    box-shadow: 0 4px 15px rgba(75, 169, 28, 0.3);
-}
-.output-box h4 {
-    margin: 0 0 0.5rem 0;
-    color: #1C1F23;
-    font-size: 1rem;
-    font-weight: 600;
-}
-.output-box .path {
-    background: #1C1F23;
-    color: #6BE31E;
-    padding: 8px 12px;
-    border-radius: 4px;
-    font-family: monospace;
-    font-size: 0.85rem;
-    word-break: break-all;
-    border: 1px solid #30353A;
-}
-.output-box .hint {
-    margin-top: 0.75rem;
-    font-size: 0.85rem;
-    color: #1C1F23;
-}
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS with Tactical Theme
+st.markdown(_theme_style_tag(), unsafe_allow_html=True)
 
 # Projects directory setup
 _PROJECTS_INIT_ERROR: OSError | None = None
 _PROJECTS_INIT_DONE: bool = False
 
 
+@st.cache_resource(show_spinner=False)
+def _probe_projects_dir() -> bool:
+    """
+    Create PROJECTS_DIR and verify it is writable.
+
+    Success is cached for the server process, so reruns skip the
+    mkdir/write/unlink probe. A failure raises and is therefore not
+    cached: the next rerun probes again.
+    """
+    SETTINGS.PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    test_path = SETTINGS.PROJECTS_DIR / ".permcheck"
+    test_path.write_text("ok", encoding="utf-8")
+    test_path.unlink()
+    return True
+
+
 def _setup_projects_dir() -> None:
     global _PROJECTS_INIT_ERROR, _PROJECTS_INIT_DONE
     if _PROJECTS_INIT_DONE:
         return
     try:
-        SETTINGS.PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
-        test_path = SETTINGS.PROJECTS_DIR / ".permcheck"
-        test_path.write_text("ok", encoding="utf-8")
-        test_path.unlink()
+        _probe_projects_dir()
         _PROJECTS_INIT_ERROR = None
         _PROJECTS_INIT_DONE = True
     except OSError as exc:
@@ -473,12 +226,16 @@ def _persist_project_artifacts(prompt: str, result: AppGenerationState, project_
             continue
 
         target_path = folder / filename
-        target_path.write_text(value, encoding="utf-8")
+        target_path.write_bytes(value.encode("utf-8"))
         saved_files.append(filename)
 
     return str(folder), saved_files
 
 
+# Output languages rendered as syntax-highlighted code blocks
+_CODE_LANGS = frozenset({"python", "javascript", "yaml", "json"})
+
+
 def render_agent_card(agent: dict, result: dict, expanded: bool = False):
     """Render a single agent's output as an expandable card."""
     step = agent["step"]
@@ -490,60 +247,87 @@ def render_agent_card(agent: dict, result: dict, expanded: bool = False):
     status = "[Done]" if has_output else "[Pending]"
 
     with st.expander(f"Step {step}: {name} - {desc} {status}", expanded=expanded):
-        if not has_output:
-            st.info("Belum ada output dari agent ini.")
-            return
+        _render_agent_outputs(agent["outputs"], result, has_output)
 
-        for output_key, filename, lang in agent["outputs"]:
-            content = result.get(output_key, "")
-            if content and content.strip():
-                st.markdown(f"**{filename}**")
-                if lang == "python":
-                    st.code(content, language="python")
-                elif lang == "javascript":
-                    st.code(content, language="javascript")
-                elif lang == "yaml":
-                    st.code(content, language="yaml")
-                elif lang == "json":
-                    st.code(content, language="json")
-                elif lang == "markdown":
-                    with st.container():
-                        st.markdown(content)
-                else:
-                    st.text(content)
-                st.divider()
+
+def _render_agent_outputs(outputs, result: dict, has_output: bool) -> None:
+    """Render an agent's output fields into the current container."""
+    if not has_output:
+        st.info("Belum ada output dari agent ini.")
+        return
+
+    for output_key, filename, lang in outputs:
+        content = result.get(output_key, "")
+        if content and content.strip():
+            st.markdown(f"**{filename}**")
+            if lang in _CODE_LANGS:
+                st.code(content, language=lang)
+            elif lang == "markdown":
+                with st.container():
+                    st.markdown(content)
+            else:
+                st.text(content)
+            st.divider()
+
+
+def _render_final_outputs(result: dict, expanded: bool = False) -> None:
+    """
+    Show each agent's final output in its live output slot.
+
+    The live panel already has one expander per agent, so the tail of the
+    stream is replaced with the full outputs in place instead of adding a
+    second set of cards with the same content. Agents without a live slot
+    fall back to render_agent_card().
+    """
+    for agent in SETTINGS.AGENTS_CONFIG:
+        container = agent_containers.get(agent["id"])
+        if container is None:
+            render_agent_card(agent, result, expanded=expanded)
+            continue
+        has_output = any(result.get(out[0], "").strip() for out in agent["outputs"])
+        with container.container():
+            _render_agent_outputs(agent["outputs"], result, has_output)
+
+
+# Colors that need dark text for readability (light backgrounds)
+_LIGHT_STEP_COLORS = frozenset({"#6BE31E", "#A7E55B", "#4BA91C"})
+_PIPELINE_STEP_TMPL = (
+    '<div class="pipeline-step">'
+    '<div class="step-num" style="background:{color};color:{text_color};">{step}</div>'
+    '<div class="step-name">{name}</div>'
+    '</div>'
+)
+_PIPELINE_CONNECTOR = '<div class="pipeline-connector"></div>'
+
+
+@st.cache_data(show_spinner=False)
+def _build_pipeline_html() -> str:
+    """Build the pipeline diagram HTML once; it only depends on the static agent config."""
+    steps = [
+        _PIPELINE_STEP_TMPL.format_map({
+            "color": color,
+            # Use dark text for light backgrounds, white for dark backgrounds
+            "text_color": "#1C1F23" if color.upper() in _LIGHT_STEP_COLORS else "#E0E8E6",
+            "step": step,
+            "name": name,
+        })
+        for _, step, name, _, color, _ in _AGENTS
+    ]
+    return f'<div class="pipeline-container">{_PIPELINE_CONNECTOR.join(steps)}</div>'
 
 
 def render_workflow_diagram():
     """Render the workflow diagram showing agent connections."""
     st.markdown("### Pipeline Overview")
-
-    # Colors that need dark text for readability (light backgrounds)
-    light_colors = {"#6BE31E", "#A7E55B", "#4BA91C"}
-
-    # Create pipeline visualization
-    pipeline_html = '<div class="pipeline-container">'
-    for idx, agent in enumerate(SETTINGS.AGENTS_CONFIG):
-        color = agent["color"]
-        # Use dark text for light backgrounds, white for dark backgrounds
-        text_color = "#1C1F23" if color.upper() in light_colors else "#E0E8E6"
-        pipeline_html += f'''
-        <div class="pipeline-step">
-            <div class="step-num" style="background:{color};color:{text_color};">{agent["step"]}</div>
-            <div class="step-name">{agent["name"]}</div>
-        </div>
-        '''
-        if idx < len(SETTINGS.AGENTS_CONFIG) - 1:
-            pipeline_html += '<div class="pipeline-connector"></div>'
-    pipeline_html += '</div>'
-
-    st.markdown(pipeline_html, unsafe_allow_html=True)
+    st.markdown(_build_pipeline_html(), unsafe_allow_html=True)
 
 
-# Header with logo
-logo_base64 = get_logo_base64()
-if logo_base64:
-    header_html = f"""
+@st.cache_data(show_spinner=False)
+def _build_header_html() -> str:
+    """Build the header HTML once; it only depends on the static logo."""
+    logo_base64 = get_logo_base64()
+    if logo_base64:
+        return f"""
     <div class="app-header">
         <img src="data:image/png;base64,{logo_base64}" alt="SATGAS Logo" class="logo">
         <div class="header-text">
@@ -552,8 +336,7 @@ if logo_base64:
         </div>
     </div>
     """
-else:
-    header_html = """
+    return """
     <div class="app-header">
         <div class="header-text">
             <h1>SATGAS</h1>
@@ -561,6 +344,10 @@ else:
         </div>
     </div>
     """
+
+
+# Header with logo
+header_html = _build_header_html()
 st.markdown(header_html, unsafe_allow_html=True)
 
 # How to Use section
@@ -581,15 +368,33 @@ st.markdown(f"""
 # Initialize session state for active agent tracking
 if "active_agent" not in st.session_state:
     st.session_state.active_agent = None
-if "saved_files" not in st.session_state:
-    st.session_state.saved_files = []
+# Sidebar shows only the last FILES_STATUS_LIMIT saved files, plus a total count
+FILES_STATUS_LIMIT = 10
+if "saved_files_recent" not in st.session_state:
+    st.session_state.saved_files_recent = deque(maxlen=FILES_STATUS_LIMIT)
+if "saved_files_total" not in st.session_state:
+    st.session_state.saved_files_total = 0
 if "project_folder" not in st.session_state:
     st.session_state.project_folder = None
 if "project_name" not in st.session_state:
     st.session_state.project_name = ""
 
 # Per-agent output tracking (must be defined before _update_sidebar_status)
-agent_logs: Dict[str, List[str]] = {agent["id"]: [] for agent in SETTINGS.AGENTS_CONFIG}
+# Only the last AGENT_LOG_WINDOW lines are ever shown, so keep a bounded window
+AGENT_LOG_WINDOW = 30
+# Minimum seconds between re-renders of one agent's output (coalesces bursts)
+AGENT_RENDER_INTERVAL = 0.05
+agent_logs: Dict[str, Deque[str]] = {
+    agent_id: deque(maxlen=AGENT_LOG_WINDOW) for agent_id, *_ in _AGENTS
+}
+_last_render: Dict[str, float] = {}
+_pending_render: set[str] = set()
+# Minimum seconds between sidebar re-renders while streaming (<= 10 Hz)
+SIDEBAR_UPDATE_INTERVAL = 0.1
+_last_sidebar_update: Dict[Callable, float] = {}
+_pending_sidebar: set[Callable] = set()
+# Agents whose graph node has finished (reported via stream_mode="updates")
+completed_agents: set[str] = set()
 agent_containers: Dict[str, st.delta_generator.DeltaGenerator] = {}
 current_agent_id: str = "orchestrator"
 file_saver: StreamingFileSaver | None = None
@@ -611,41 +416,47 @@ with st.sidebar:
 
 def _update_sidebar_status():
     """Update sidebar with current agent status."""
-    status_html = ""
-    for agent in SETTINGS.AGENTS_CONFIG:
-        agent_id = agent["id"]
-        step = agent["step"]
-        name = agent["name"]
-
+    parts = []
+    for agent_id, step, name, *_ in _AGENTS:
         if agent_id == st.session_state.active_agent:
             # Currently running
-            status_html += f'<div class="status-card running"><span class="step-badge active">{step}</span><b>{name}</b> - Running...</div>'
-        elif agent_logs.get(agent_id) and len(agent_logs[agent_id]) > 1:
+            parts.append(f'<div class="status-card running"><span class="step-badge active">{step}</span><b>{name}</b> - Running...</div>')
+        elif agent_id in completed_agents or (agent_logs.get(agent_id) and len(agent_logs[agent_id]) > 1):
             # Completed
-            status_html += f'<div class="status-card completed"><span class="step-badge completed">{step}</span>{name} - Done</div>'
+            parts.append(f'<div class="status-card completed"><span class="step-badge completed">{step}</span>{name} - Done</div>')
         else:
             # Pending
-            status_html += f'<div class="status-card pending"><span class="step-badge">{step}</span>{name}</div>'
+            parts.append(f'<div class="status-card pending"><span class="step-badge">{step}</span>{name}</div>')
 
-    sidebar_status.markdown(status_html, unsafe_allow_html=True)
+    sidebar_status.markdown("".join(parts), unsafe_allow_html=True)
 
 
 def _update_files_status():
     """Update sidebar with saved files list."""
-    if not st.session_state.saved_files:
+    total = st.session_state.saved_files_total
+    if not total:
         files_status.markdown('<div class="files-empty">No files yet...</div>', unsafe_allow_html=True)
         return
 
-    files_html = ""
-    for filepath in st.session_state.saved_files[-10:]:  # Show last 10 files
-        files_html += f'<div class="file-item">{filepath}</div>'
+    parts = [f'<div class="file-item">{filepath}</div>' for filepath in st.session_state.saved_files_recent]
 
-    total = len(st.session_state.saved_files)
-    if total > 10:
-        files_html += f'<div class="files-more">...and {total - 10} more files</div>'
+    if total > FILES_STATUS_LIMIT:
+        parts.append(f'<div class="files-more">...and {total - FILES_STATUS_LIMIT} more files</div>')
 
-    files_html += f'<div class="files-total">Total: {total} files</div>'
-    files_status.markdown(files_html, unsafe_allow_html=True)
+    parts.append(f'<div class="files-total">Total: {total} files</div>')
+    files_status.markdown("".join(parts), unsafe_allow_html=True)
+
+
+def _update_sidebar_throttled(update: Callable) -> None:
+    """Run a sidebar update at most every SIDEBAR_UPDATE_INTERVAL seconds."""
+    now = time.monotonic()
+    if now - _last_sidebar_update.get(update, 0.0) < SIDEBAR_UPDATE_INTERVAL:
+        # Applied by the next update or by _flush_pending_ui()
+        _pending_sidebar.add(update)
+        return
+    _last_sidebar_update[update] = now
+    _pending_sidebar.discard(update)
+    update()
 
 
 _update_sidebar_status()
@@ -676,62 +487,155 @@ with col1:
 status_placeholder = st.empty()
 
 
-def _get_agent_id_from_line(line: str) -> str | None:
-    """Extract agent ID from log line like '[Orchestrator] ...'"""
-    match = re.match(r'\[([^\]]+)\]', line)
-    if match:
-        agent_name = match.group(1)
-        return AGENT_NAME_MAP.get(agent_name)
-    return None
+# (agent_id, expander label) pairs for the live output panel
+_LIVE_PANEL_LABELS = tuple(
+    (agent_id, f"Step {step}: {name} - {desc}")
+    for agent_id, step, name, desc, *_ in _AGENTS
+)
+
+
+def _render_live_output_panel(expanded: bool = False) -> None:
+    """Render the per-agent live output expanders.
+
+    Streaming never reruns the script: ``_stream_output`` writes straight
+    into the placeholders created here, so each line only sends that
+    placeholder's delta.
+    """
+    st.markdown("### Live Agent Output")
+    st.caption("Click on an agent to view streaming output. Files are saved automatically as they are generated.")
+    for agent_id, label in _LIVE_PANEL_LABELS:
+        with st.expander(label, expanded=expanded):
+            # The returned element is itself replaceable, so it doubles as the
+            # placeholder (one delta instead of st.empty() + .code())
+            agent_containers[agent_id] = st.code("Waiting...", language="text")
+
+
+def _record_saved_file(filepath: str) -> None:
+    """Track a saved file for the sidebar (bounded recent list + total count)."""
+    st.session_state.saved_files_recent.append(filepath)
+    st.session_state.saved_files_total += 1
 
 
 def _on_file_saved(filepath: str, size: int) -> None:
     """Callback when a file is saved by StreamingFileSaver."""
-    st.session_state.saved_files.append(filepath)
-    _update_files_status()
+    _record_saved_file(filepath)
+    _update_sidebar_throttled(_update_files_status)
 
 
-def _stream_output(line: str) -> None:
+def _stream_output(message: str) -> None:
+    """Handle one status message; batched messages carry several lines of one agent."""
     global current_agent_id, file_saver
-    safe_line = sanitize_for_output(line)
 
-    # Detect agent from line prefix (e.g., "[Backend Engineer] ...")
-    detected_id = _get_agent_id_from_line(safe_line)
+    # Detect agent from message prefix (e.g., "[Backend Engineer] ...")
+    # One match serves both the ID lookup and the file saver's agent name
+    # Most messages carry no prefix: skip the regex with a cheap startswith check
+    match = _AGENT_PREFIX_RE.match(message) if message.startswith('[') else None
+    detected_id = AGENT_NAME_MAP.get(match.group(1)) if match else None
     detected_agent_name = None
     if detected_id:
         current_agent_id = detected_id
         st.session_state.active_agent = detected_id
-        _update_sidebar_status()
-        # Extract full agent name from line for file saver
-        match = re.match(r'\[([^\]]+)\]', safe_line)
-        if match:
-            detected_agent_name = match.group(1)
+        _update_sidebar_throttled(_update_sidebar_status)
+        # Full agent name from line for file saver
+        detected_agent_name = match.group(1)
+
+    # Only the first line of a batch carries the agent prefix
+    lines = message.split("\n")
+    prefix = f"[{detected_agent_name}] " if detected_agent_name else ""
+    log = agent_logs.get(current_agent_id)
 
-    # Process line for incremental file saving
+    # Process lines for incremental file saving, one saver call per batch
     # Pass agent name to file saver for parallel execution safety
     if file_saver is not None:
-        # Remove agent prefix like "[Agent Name] " from the line
-        line_for_saver = re.sub(r'^\[[^\]]+\]\s*', '', line)
+        lines_for_saver = lines
+        if message.startswith('['):
+            # Remove agent prefix like "[Agent Name] " from the first line
+            lines_for_saver = [_AGENT_PREFIX_STRIP_RE.sub('', lines[0]), *lines[1:]]
         # Pass agent name so file saver can handle agent switches properly
-        file_saver.process_line(line_for_saver, agent_name=detected_agent_name or current_agent_id)
+        file_saver.process_lines(lines_for_saver, agent_name=detected_agent_name or current_agent_id)
+
+    # Add raw lines to current agent's log (sanitized once per repaint)
+    # and update the agent's container
+    if log is not None:
+        log.append(lines[0])
+        log.extend(prefix + line for line in lines[1:])
+        _render_agent_output(current_agent_id)
+
+
+def _on_node_done(agent_id: str) -> None:
+    """Callback when a graph node finishes: mark the agent done in the sidebar."""
+    completed_agents.add(agent_id)
+    if st.session_state.active_agent == agent_id:
+        st.session_state.active_agent = None
+    _update_sidebar_status()
+
+
+async def _run_pipeline(
+    initial_state: AppGenerationState, config: dict, cancel: threading.Event
+) -> AppGenerationState | None:
+    """
+    Stream the graph and return its final state.
+
+    "updates" chunks arrive as each node completes, so the sidebar marks
+    agents done as soon as they finish instead of after the whole run;
+    "values" chunks carry the merged state, the last one being the result.
+    Stops between agent updates once ``cancel`` is set (script rerun/stop).
+    """
+    on_node_done = _get_thread_safe_callback(_on_node_done)
+    result = None
+    async for mode, chunk in get_app().astream(
+        initial_state, config=config, stream_mode=["updates", "values"]
+    ):
+        if cancel.is_set():
+            break
+        if mode == "updates":
+            for node_id in chunk:
+                on_node_done(node_id)
+        else:
+            result = chunk
+    return result
+
 
-    # Add line to current agent's log
-    if current_agent_id in agent_logs:
-        agent_logs[current_agent_id].append(safe_line)
+def _render_agent_output(agent_id: str, force: bool = False) -> None:
+    """Re-render an agent's output window, throttled to AGENT_RENDER_INTERVAL."""
+    container = agent_containers.get(agent_id)
+    if container is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_render.get(agent_id, 0.0) < AGENT_RENDER_INTERVAL:
+        # Skipped lines are shown by the next render or the final flush
+        _pending_render.add(agent_id)
+        return
+    _last_render[agent_id] = now
+    _pending_render.discard(agent_id)
+    container.code(sanitize_for_output("\n".join(agent_logs[agent_id])), language="text")
 
-        # Update the agent's container
-        if current_agent_id in agent_containers:
-            window = "\n".join(agent_logs[current_agent_id][-30:])
-            agent_containers[current_agent_id].code(window, language="text")
+
+def _flush_agent_output() -> None:
+    """Render any agent windows whose last update was throttled."""
+    for agent_id in list(_pending_render):
+        _render_agent_output(agent_id, force=True)
+
+
+def _flush_pending_ui() -> None:
+    """Apply throttled agent-output and sidebar updates that are now due."""
+    now = time.monotonic()
+    for agent_id in list(_pending_render):
+        if now - _last_render.get(agent_id, 0.0) >= AGENT_RENDER_INTERVAL:
+            _render_agent_output(agent_id, force=True)
+    for update in list(_pending_sidebar):
+        _update_sidebar_throttled(update)
 
 
 if generate_btn:
     if prompt:
         # Reset logs and state
         for agent_id in agent_logs:
-            agent_logs[agent_id] = []
+            agent_logs[agent_id].clear()
+        completed_agents.clear()
         st.session_state.active_agent = "orchestrator"
-        st.session_state.saved_files = []
+        st.session_state.saved_files_recent.clear()
+        st.session_state.saved_files_total = 0
         _update_sidebar_status()
         _update_files_status()
 
@@ -754,47 +658,49 @@ if generate_btn:
         )
 
         # Save prompt file immediately
-        (project_folder / "prompt.txt").write_text(prompt, encoding="utf-8")
-        st.session_state.saved_files.append("prompt.txt")
+        (project_folder / "prompt.txt").write_bytes(prompt.encode("utf-8"))
+        _record_saved_file("prompt.txt")
         _update_files_status()
 
         # Use thread-safe callback for parallel execution
-        llm.set_status_callback(_get_thread_safe_callback(_stream_output))
+        get_llm().set_status_callback(_get_thread_safe_callback(_stream_output))
         initial_state = create_initial_state(prompt)
 
         status_placeholder.info(f"Running pipeline... Output directory: `{project_folder}`")
 
         # Create live output containers for each agent
-        st.markdown("### Live Agent Output")
-        st.caption("Click on an agent to view streaming output. Files are saved automatically as they are generated.")
-        for agent in SETTINGS.AGENTS_CONFIG:
-            with st.expander(f"Step {agent['step']}: {agent['name']} - {agent['description']}", expanded=False):
-                agent_containers[agent["id"]] = st.empty()
-                agent_containers[agent["id"]].code("Waiting...", language="text")
+        _render_live_output_panel(expanded=auto_expand)
 
         result = None
 
         try:
-            # Config dengan thread_id untuk checkpointer (diperlukan untuk parallel execution)
+            # thread_id dipakai checkpointer jika SATGAS_CHECKPOINT aktif
             config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-            result = graph_app.invoke(initial_state, config=config)
+            # Async nodes let parallel branches overlap while waiting on the LLM
+            cancel = threading.Event()
+            result = _run_with_ui_drain(
+                asyncio.run, _run_pipeline(initial_state, config, cancel), cancel=cancel
+            )
         except Exception as exc:
             status_placeholder.error(f"Generation failed: {format_exception(exc)}")
             st.error("Process failed. Check the agent output above for details.")
         else:
             status_placeholder.success("Generation completed successfully!")
         finally:
-            llm.set_status_callback(None)
+            get_llm().set_status_callback(None)
+            _flush_agent_output()
+            _pending_sidebar.clear()
             st.session_state.active_agent = None
             _update_sidebar_status()
             # Finalize file saver to save any incomplete files
             if file_saver:
                 file_saver.finalize()
+                _drain_ui_queue()
                 _update_files_status()
 
         if result:
-            saved_files = st.session_state.saved_files
-            if saved_files:
+            total_files = st.session_state.saved_files_total
+            if total_files:
                 # Run code formatters to fix indentation and styling
                 format_placeholder = st.empty()
                 format_placeholder.info("Formatting code with black & prettier...")
@@ -818,7 +724,7 @@ if generate_btn:
                     <h4>Aplikasi Berhasil Di-generate!</h4>
                     <div class="path">{project_folder}</div>
                     <div class="hint">
-                        Total {len(saved_files)} file telah dibuat. Buka folder di atas untuk melihat hasil generate.
+                        Total {total_files} file telah dibuat. Buka folder di atas untuk melihat hasil generate.
                     </div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -831,12 +737,9 @@ if generate_btn:
             if show_workflow:
                 render_workflow_diagram()
 
-            st.markdown("### Agent Outputs")
-            st.markdown("Click to expand/collapse each agent's output:")
-
-            # Render each agent's output as a card
-            for agent in SETTINGS.AGENTS_CONFIG:
-                render_agent_card(agent, result, expanded=auto_expand)
+            # Replace the live output tails with each agent's full output
+            _render_final_outputs(result, expanded=auto_expand)
+            st.caption("Full agent outputs are shown in the Live Agent Output panel above.")
 
             # Summary section
             st.divider()
@@ -847,12 +750,11 @@ if generate_btn:
                 st.metric("Total Agents", "8")
             with col2:
                 completed = sum(
-                    1 for a in SETTINGS.AGENTS_CONFIG
-                    if any(result.get(o[0], "").strip() for o in a["outputs"])
+                    1 for *_, outputs in _AGENTS
+                    if any(result.get(key, "").strip() for key, *_ in outputs)
                 )
                 st.metric("Completed", f"{completed}/8")
             with col3:
-                total_files = len(saved_files)
                 st.metric("Files Generated", total_files)
 
             st.markdown(f"**Final Status:** `{result.get('status', 'unknown')}`")
@@ -1,5 +1,12 @@
 from .state import AppGenerationState
-from .llm import LocalQwenLLM, llm
-from .workflow import create_workflow, app
+from .llm import LocalQwenLLM, get_llm
+from .workflow import create_workflow, get_app
 
-__all__ = ["AppGenerationState", "LocalQwenLLM", "llm", "create_workflow", "app"]
+__all__ = ["AppGenerationState", "LocalQwenLLM", "get_llm", "create_workflow", "get_app", "app"]
+
+
+def __getattr__(name: str):
+    # Compiled workflow dibuat saat pertama diakses (lihat workflow.get_app)
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,25 @@
 """LLM wrapper supporting multiple providers: Qwen CLI and OpenAI API."""
+import json
 import os
+import queue
+import shlex
+import shutil
 import subprocess
 import sys
 import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Callable
+from dataclasses import dataclass
+from typing import Any, Callable
 
 from dotenv import load_dotenv
 
+try:
+    # Optional: faster JSON decoding for streamed chunks
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 load_dotenv()
 
 if hasattr(sys.stdout, "reconfigure"):
@@ -15,25 +27,210 @@ if hasattr(sys.stdout, "reconfigure"):
     sys.stderr.reconfigure(encoding="utf-8")
 
 
+@dataclass(frozen=True, slots=True)
+class LLMConfig:
+    """LLM settings from the environment, read once and shared by all LLM instances."""
+    provider: str = "qwen"
+    # Qwen CLI
+    qwen_command: str = "qwen"
+    qwen_model: str | None = None
+    qwen_timeout: int = 0  # 0 = wait until done
+    qwen_worker_command: str | None = None
+    qwen_pool_size: int = 3
+    # OpenAI API
+    openai_api_key: str | None = None
+    openai_model: str = "gpt-4o-mini"
+    openai_base_url: str | None = None  # For custom endpoints
+    openai_temperature: float = 0.7
+    openai_max_tokens: int = 4096
+    # stream_options.include_usage; some compatible servers reject it with 400
+    openai_stream_usage: bool = True
+    # Streaming: max lines per status callback (1 = per line)
+    status_batch: int = 16
+
+    @classmethod
+    def from_env(cls) -> "LLMConfig":
+        """Build the config from environment variables (.env already loaded)."""
+        base_url = os.getenv("OPENAI_BASE_URL")
+        # Default on for api.openai.com only; custom endpoints opt in
+        stream_usage = os.getenv("OPENAI_STREAM_USAGE", "" if base_url else "1")
+        return cls(
+            provider=os.getenv("LLM_PROVIDER", "qwen").lower(),
+            qwen_command=os.getenv("QWEN_CLI_COMMAND", "qwen"),
+            qwen_model=os.getenv("QWEN_MODEL"),
+            qwen_timeout=int(os.getenv("QWEN_TIMEOUT", "0")),
+            qwen_worker_command=os.getenv("QWEN_WORKER_COMMAND"),
+            qwen_pool_size=int(os.getenv("QWEN_POOL_SIZE", "3")),
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            openai_base_url=base_url,
+            openai_temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
+            openai_max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4096")),
+            openai_stream_usage=stream_usage.strip().lower() in ("1", "true", "yes"),
+            status_batch=int(os.getenv("LLM_STATUS_BATCH", "16")),
+        )
+
+
+# Environment is parsed once at import; pass a custom LLMConfig to override
+LLM_CONFIG = LLMConfig.from_env()
+
+
+def _content_to_text(content) -> str:
+    """Flatten message content (plain string or list of content blocks) to text.
+
+    Content blocks keep their order, so a static block marked with
+    ``cache_control`` stays in the prompt prefix where providers with
+    automatic prefix caching (OpenAI) can reuse it.
+    """
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or ():
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("text"):
+            parts.append(block["text"])
+    return "\n".join(parts)
+
+
+# Streamed lines are forwarded to the status callback in batches of up to
+# LLM_STATUS_BATCH lines or every STATUS_FLUSH_INTERVAL seconds (1 = per line)
+STATUS_FLUSH_INTERVAL = 0.1
+
+
+class _StatusBuffer:
+    """Collect streamed lines and forward them to a notify function in batches."""
+
+    __slots__ = ("notify", "max_lines", "_lines", "_last_flush")
+
+    def __init__(self, notify: Callable[[str], None], max_lines: int):
+        self.notify = notify
+        self.max_lines = max(1, max_lines)
+        self._lines: list[str] = []
+        self._last_flush = time.monotonic()
+
+    def add(self, line: str) -> None:
+        """Queue one line, flushing when the batch is full or stale."""
+        if not line:
+            return
+        self._lines.append(line)
+        if len(self._lines) >= self.max_lines or time.monotonic() - self._last_flush >= STATUS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        """Forward all queued lines as one newline-joined message."""
+        if self._lines:
+            self.notify("\n".join(self._lines))
+            self._lines.clear()
+        self._last_flush = time.monotonic()
+
+    def wait_timeout(self, remaining: float | None) -> float | None:
+        """How long a reader may block before the queued lines go stale."""
+        if not self._lines:
+            return remaining
+        due = max(0.0, STATUS_FLUSH_INTERVAL - (time.monotonic() - self._last_flush))
+        return due if remaining is None else min(remaining, due)
+
+
+def _start_line_reader(lines, name: str) -> "queue.Queue[Any]":
+    """
+    Read lines from an iterable on a daemon thread; None marks EOF.
+
+    A read error is queued as the exception object and re-raised by
+    _drain_lines, so the consuming thread sees it like a direct read.
+    """
+    queued: queue.Queue[Any] = queue.Queue()
+
+    def pump():
+        try:
+            for line in lines:
+                queued.put(line)
+        except Exception as exc:
+            queued.put(exc)
+        finally:
+            queued.put(None)
+
+    threading.Thread(target=pump, name=name, daemon=True).start()
+    return queued
+
+
+def _drain_lines(queued: "queue.Queue[Any]", status: _StatusBuffer, deadline: float | None):
+    """
+    Yield lines from a _start_line_reader queue until EOF.
+
+    While the stream stalls, lines already in status are flushed once they
+    are STATUS_FLUSH_INTERVAL old, on this thread so the agent prefix stays.
+    Raises TimeoutError once the monotonic deadline (None = never) passes.
+    """
+    while True:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            line = queued.get(timeout=status.wait_timeout(remaining))
+        except queue.Empty:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError from None
+            status.flush()
+            continue
+        if line is None:
+            return
+        if isinstance(line, Exception):
+            raise line
+        yield line
+
+
+def _message_text(message) -> str:
+    """Text of one message, flattening block-list content."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return _content_to_text(content)
+
+
+def _concat_messages(messages) -> str:
+    """Join the text of all messages with content into one prompt string."""
+    # Agents send a single message: no list or join needed
+    if type(messages) is list and len(messages) == 1:
+        message = messages[0]
+        return _message_text(message).strip() if getattr(message, "content", None) else ""
+    try:
+        parts = [_message_text(m) for m in messages if m.content]
+    except AttributeError:
+        # Rare: objects without .content are skipped
+        parts = [_message_text(m) for m in messages if getattr(m, "content", None)]
+    return "\n".join(parts).strip()
+
+
 class LLMResponse:
     """Simple response wrapper to match LangChain API."""
+
+    __slots__ = ("content",)
+
     def __init__(self, content: str):
         self.content = content
 
 
+class _AgentLocal(threading.local):
+    """Per-thread agent name; the class default makes unset threads read None."""
+    agent_name: str | None = None
+
+
 class BaseLLM(ABC):
     """Abstract base class for LLM providers."""
 
-    def __init__(self):
+    # Fixed attribute layout, no per-instance __dict__
+    __slots__ = ("status_callback", "_thread_local", "status_batch")
+
+    def __init__(self, config: LLMConfig | None = None):
         self.status_callback: Callable[[str], None] | None = None
-        self._lock = threading.Lock()  # Lock for thread-safe access
-        # Use thread-local storage for current_agent to avoid race conditions
-        self._thread_local = threading.local()
+        # Use thread-local storage for current_agent to avoid race conditions:
+        # the global LLM is shared by all parallel branch threads
+        self._thread_local = _AgentLocal()
+        self.status_batch = (config or LLM_CONFIG).status_batch
 
     @property
     def current_agent(self) -> str | None:
         """Get current agent name (thread-local)."""
-        return getattr(self._thread_local, 'agent_name', None)
+        return self._thread_local.agent_name
 
     @current_agent.setter
     def current_agent(self, value: str | None):
@@ -48,13 +245,18 @@ class BaseLLM(ABC):
         """Set the callback for status updates."""
         self.status_callback = callback
 
+    def _status_buffer(self) -> _StatusBuffer:
+        """Create a batching buffer for one streamed response (use from one thread)."""
+        return _StatusBuffer(self._notify_status, self.status_batch)
+
     def _notify_status(self, message: str):
         """Notify the callback with a status message."""
         if not message or self.status_callback is None:
             return
         try:
-            if self.current_agent:
-                message = f"[{self.current_agent}] {message}"
+            agent_name = self._thread_local.agent_name
+            if agent_name:
+                message = f"[{agent_name}] {message}"
             self.status_callback(message)
         except Exception:
             pass
@@ -65,26 +267,155 @@ class BaseLLM(ABC):
         pass
 
 
+def _unquote(token: str) -> str:
+    """Strip one pair of matching surrounding quotes from a command token."""
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'":
+        return token[1:-1]
+    return token
+
+
+def _resolve_cli(command: str) -> list[str]:
+    """
+    Resolve a CLI command string to the argv prefix used to launch it.
+
+    The executable is looked up once with shutil.which() and run directly
+    (shell=False). Windows batch shims (.bat/.cmd, e.g. npm-installed qwen)
+    still need the command interpreter, so only those go through cmd /c.
+    """
+    parts = shlex.split(command, posix=os.name != "nt") or [command]
+    # Non-POSIX splitting keeps the quotes: "C:\Program Files\...\qwen.cmd"
+    parts = [_unquote(part) for part in parts]
+    resolved = shutil.which(parts[0]) or parts[0]
+    if os.name == "nt" and resolved.lower().endswith((".bat", ".cmd")):
+        return ["cmd", "/c", resolved, *parts[1:]]
+    return [resolved, *parts[1:]]
+
+
+# Sentinel lines of the persistent worker protocol (see _QwenWorker)
+WORKER_PROMPT_START = "<<<PROMPT"
+WORKER_PROMPT_END = ">>>END"
+WORKER_DONE = "<<<DONE"
+
+
+def _lines_until_done(stream):
+    """Yield worker stdout lines up to and including the WORKER_DONE sentinel."""
+    for line in stream:
+        yield line
+        if line.rstrip("\r\n") == WORKER_DONE:
+            return
+
+
+class _QwenWorker:
+    """Long-lived Qwen CLI process that answers one prompt at a time.
+
+    Contract for the worker command (one request in, one response block out):
+    stdin receives ``<<<PROMPT``, the prompt lines and ``>>>END``; the worker
+    writes the response lines to stdout followed by a single ``<<<DONE`` line
+    and prints nothing else. Startup cost is paid once instead of per invoke.
+    """
+
+    __slots__ = ("args", "process")
+
+    def __init__(self, args: list[str]):
+        self.args = args
+        self.process: subprocess.Popen | None = None
+
+    def _ensure_started(self) -> subprocess.Popen:
+        """Start the worker process if it is not running."""
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                self.args,
+                stdout=subprocess.PIPE,
+                stdin=subprocess.PIPE,
+                shell=False,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                bufsize=-1,
+            )
+        return self.process
+
+    def exchange(self, prompt: str, status: _StatusBuffer, timeout: int = 0) -> list[str]:
+        """Send one prompt and collect the response lines up to WORKER_DONE."""
+        process = self._ensure_started()
+        if process.stdout is None or process.stdin is None:
+            raise RuntimeError("Unable to capture Qwen worker streams.")
+
+        # timeout=0 means wait until done; otherwise kill a worker that hangs
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        try:
+            process.stdin.write(f"{WORKER_PROMPT_START}\n{prompt}\n{WORKER_PROMPT_END}\n")
+            process.stdin.flush()
+
+            # The reader stops at the sentinel, leaving stdout to the next exchange
+            lines = _start_line_reader(_lines_until_done(process.stdout), "qwen-worker")
+            output_lines = []
+            for line in _drain_lines(lines, status, deadline):
+                cleaned = line.rstrip("\r\n")
+                if cleaned == WORKER_DONE:
+                    return output_lines
+                output_lines.append(cleaned)
+                status.add(cleaned)
+        except TimeoutError:
+            self.close()
+            raise RuntimeError(f"Qwen CLI timed out after {timeout} seconds.") from None
+        except (OSError, ValueError) as exc:
+            self.close()
+            raise RuntimeError(f"Qwen worker error: {exc}") from exc
+
+        # stdout closed before the sentinel: the worker died
+        self.close()
+        raise RuntimeError("Qwen worker exited before finishing the response.")
+
+    def close(self) -> None:
+        """Terminate the worker process."""
+        process, self.process = self.process, None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
 class LocalQwenLLM(BaseLLM):
     """LLM wrapper that uses local Qwen CLI for inference."""
 
+    __slots__ = (
+        "command", "model", "timeout", "worker_command", "pool_size",
+        "_pool", "_pool_lock", "_cli_args", "_workers",
+    )
+
     def __init__(
         self,
         command: str | None = None,
         model: str | None = None,
         timeout: int | None = None,
+        worker_command: str | None = None,
+        pool_size: int | None = None,
+        config: LLMConfig | None = None,
     ):
-        super().__init__()
-        self.command = command or os.getenv("QWEN_CLI_COMMAND", "qwen")
-        self.model = model or os.getenv("QWEN_MODEL")
+        config = config or LLM_CONFIG
+        super().__init__(config)
+        self.command = command or config.qwen_command
+        self.model = model or config.qwen_model
         # timeout=0 means wait until done (no timeout)
-        self.timeout = timeout if timeout is not None else int(os.getenv("QWEN_TIMEOUT", "0"))
+        self.timeout = timeout if timeout is not None else config.qwen_timeout
+        # Optional persistent workers speaking the _QwenWorker protocol
+        self.worker_command = worker_command or config.qwen_worker_command
+        # One worker per concurrent request; 3 covers the widest parallel phase
+        self.pool_size = max(1, pool_size if pool_size is not None else config.qwen_pool_size)
+        self._pool: queue.Queue[_QwenWorker] = queue.Queue()
+        # Guards pool growth only; a checked-out worker has a single owner
+        self._pool_lock = threading.Lock()
+        # Resolved once; launched directly instead of through cmd.exe
+        self._cli_args = _resolve_cli(self.command)
+        self._workers: list[_QwenWorker] = []
 
     def invoke(self, messages) -> LLMResponse:
         """Invoke the LLM with the given messages."""
-        prompt = "\n".join(
-            m.content for m in messages if getattr(m, "content", None)
-        ).strip()
+        prompt = _concat_messages(messages)
 
         if not prompt:
             raise ValueError("LocalQwenLLM received an empty prompt.")
@@ -100,7 +431,10 @@ class LocalQwenLLM(BaseLLM):
 
     def _run_qwen(self, prompt: str) -> str:
         """Run the Qwen CLI with the given prompt."""
-        args = ["cmd", "/c", self.command]
+        if self.worker_command:
+            return self._run_worker(prompt)
+
+        args = list(self._cli_args)
         if self.model:
             args.extend(["-m", self.model])
         args.extend(["--output-format", "text"])
@@ -111,6 +445,7 @@ class LocalQwenLLM(BaseLLM):
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 stdin=subprocess.PIPE,
+                shell=False,
                 text=True,
                 encoding='utf-8',
                 errors='replace'
@@ -124,15 +459,29 @@ class LocalQwenLLM(BaseLLM):
                 process.stdin.flush()
                 process.stdin.close()
 
-                for line in process.stdout:
-                    cleaned = line.rstrip("\r\n")
-                    output_lines.append(cleaned)
-                    self._notify_status(cleaned)
-
                 # timeout=0 means wait indefinitely until process finishes
-                wait_timeout = self.timeout if self.timeout > 0 else None
+                deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+                # QWEN_TIMEOUT also applies while the CLI is still streaming
+                lines = _start_line_reader(process.stdout, "qwen-stdout")
+
+                status = self._status_buffer()
+                try:
+                    for line in _drain_lines(lines, status, deadline):
+                        cleaned = line.rstrip("\r\n")
+                        output_lines.append(cleaned)
+                        status.add(cleaned)
+                except TimeoutError:
+                    process.kill()
+                    raise RuntimeError(
+                        f"Qwen CLI timed out after {self.timeout} seconds."
+                    ) from None
+                except (OSError, ValueError):
+                    pass  # Stream closed: the exit code below reports failures
+                status.flush()
+
                 try:
-                    process.wait(timeout=wait_timeout)
+                    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    process.wait(timeout=remaining)
                 except subprocess.TimeoutExpired as exc:
                     process.kill()
                     raise RuntimeError(
@@ -149,10 +498,60 @@ class LocalQwenLLM(BaseLLM):
                 f"Failed to invoke Qwen CLI ({self.command}): {exc}"
             ) from exc
 
+    def _run_worker(self, prompt: str) -> str:
+        """Run the prompt on a persistent Qwen worker checked out from the pool."""
+        worker = self._checkout_worker()
+        try:
+            status = self._status_buffer()
+            output_lines = worker.exchange(prompt, status, self.timeout)
+            status.flush()
+        except FileNotFoundError as exc:
+            raise RuntimeError(
+                f"Failed to invoke Qwen worker ({self.worker_command}): {exc}"
+            ) from exc
+        finally:
+            self._pool.put(worker)
+
+        return "\n".join(output_lines).strip()
+
+    def _checkout_worker(self) -> _QwenWorker:
+        """Take an idle worker, creating one while the pool is below pool_size."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._workers) < self.pool_size:
+                args = _resolve_cli(self.worker_command)
+                if self.model:
+                    args.extend(["-m", self.model])
+                worker = _QwenWorker(args)
+                self._workers.append(worker)
+                return worker
+        # Pool is full: wait for a parallel branch to return its worker
+        return self._pool.get()
+
+    def close(self) -> None:
+        """Terminate all persistent workers."""
+        for worker in self._workers:
+            worker.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# Enough pooled connections for every parallel-phase agent plus headroom
+OPENAI_MAX_CONNECTIONS = 16
+
 
 class OpenAILLM(BaseLLM):
     """LLM wrapper that uses OpenAI API for inference."""
 
+    __slots__ = ("api_key", "model", "base_url", "temperature", "max_tokens", "stream_usage", "_client")
+
     def __init__(
         self,
         api_key: str | None = None,
@@ -160,13 +559,16 @@ class OpenAILLM(BaseLLM):
         base_url: str | None = None,
         temperature: float | None = None,
         max_tokens: int | None = None,
+        config: LLMConfig | None = None,
     ):
-        super().__init__()
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")  # For custom endpoints
-        self.temperature = temperature if temperature is not None else float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
-        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv("OPENAI_MAX_TOKENS", "4096"))
+        config = config or LLM_CONFIG
+        super().__init__(config)
+        self.api_key = api_key or config.openai_api_key
+        self.model = model or config.openai_model
+        self.base_url = base_url or config.openai_base_url  # For custom endpoints
+        self.temperature = temperature if temperature is not None else config.openai_temperature
+        self.max_tokens = max_tokens if max_tokens is not None else config.openai_max_tokens
+        self.stream_usage = config.openai_stream_usage
         self._client = None
 
     def _get_client(self):
@@ -188,14 +590,38 @@ class OpenAILLM(BaseLLM):
             if self.base_url:
                 client_kwargs["base_url"] = self.base_url
 
+            client_kwargs["http_client"] = self._build_http_client()
+
             self._client = OpenAI(**client_kwargs)
         return self._client
 
+    @staticmethod
+    def _build_http_client():
+        """HTTP client shared by all streams of this LLM.
+
+        Parallel agents stream concurrently, so HTTP/2 multiplexes them over a
+        single keep-alive connection. Falls back to HTTP/1.1 when the optional
+        ``h2`` package (``pip install httpx[http2]``) is missing.
+        """
+        import httpx
+
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+
+        return httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            ),
+        )
+
     def invoke(self, messages) -> LLMResponse:
         """Invoke the LLM with the given messages."""
-        prompt = "\n".join(
-            m.content for m in messages if getattr(m, "content", None)
-        ).strip()
+        prompt = _concat_messages(messages)
 
         if not prompt:
             raise ValueError("OpenAILLM received an empty prompt.")
@@ -214,54 +640,115 @@ class OpenAILLM(BaseLLM):
         client = self._get_client()
 
         output_lines = []
+        # The usage chunk feeds the prompt cache report (OPENAI_STREAM_USAGE)
+        extra = {"stream_options": {"include_usage": True}} if self.stream_usage else {}
 
         try:
-            # Use streaming for real-time output
-            stream = client.chat.completions.create(
+            # Use streaming for real-time output. The raw SSE lines are decoded
+            # directly instead of building a Pydantic chunk model per token.
+            with client.chat.completions.with_streaming_response.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 stream=True,
-            )
-
-            current_line = ""
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-
-                    # Process character by character to handle newlines
-                    for char in content:
-                        if char == "\n":
-                            if current_line:
-                                output_lines.append(current_line)
-                                self._notify_status(current_line)
-                            current_line = ""
-                        else:
-                            current_line += char
+                **extra,
+            ) as response:
+                current_line = ""
+                usage = None
+                status = self._status_buffer()
+                # Read on a helper thread so a stalled stream still flushes status
+                lines = _start_line_reader(response.iter_lines(), "openai-stream")
+                for raw in _drain_lines(lines, status, None):
+                    # Skip blank separators, comments and non-data fields
+                    if not raw.startswith("data:"):
+                        continue
+                    payload = raw[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    chunk = _json_loads(payload)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"].get("message") or str(chunk["error"]))
+                    # The final usage chunk has no choices
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    choices = chunk.get("choices")
+                    if not choices:
+                        continue
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if not content:
+                        continue
+
+                    # Scan only the new delta for newlines (C-level str.find);
+                    # the unfinished tail carries over in current_line
+                    start = 0
+                    while (newline := content.find("\n", start)) >= 0:
+                        line = current_line + content[start:newline]
+                        current_line = ""
+                        if line:
+                            output_lines.append(line)
+                            status.add(line)
+                        start = newline + 1
+                    current_line += content[start:]
 
             # Don't forget the last line if it doesn't end with newline
             if current_line:
                 output_lines.append(current_line)
-                self._notify_status(current_line)
+                status.add(current_line)
+            status.flush()
+
+            self._notify_cache_usage(usage)
 
             return "\n".join(output_lines).strip()
 
         except Exception as e:
             raise RuntimeError(f"OpenAI API error: {str(e)}") from e
 
+    def _notify_cache_usage(self, usage) -> None:
+        """Report how many prompt tokens were served from the provider cache."""
+        if not usage:
+            return
+        # usage is the raw JSON dict from the stream
+        details = usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") or 0
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        if prompt_tokens:
+            self._notify_status(
+                f">>> Prompt cache: {cached}/{prompt_tokens} tokens "
+                f"({cached * 100 // prompt_tokens}% hit)"
+            )
+
 
-def create_llm() -> BaseLLM:
+def create_llm(config: LLMConfig | None = None) -> BaseLLM:
     """Factory function to create the appropriate LLM based on configuration."""
-    provider = os.getenv("LLM_PROVIDER", "qwen").lower()
+    config = config or LLM_CONFIG
+    provider = config.provider
 
     if provider == "openai":
-        return OpenAILLM()
+        return OpenAILLM(config=config)
     elif provider == "qwen":
-        return LocalQwenLLM()
+        return LocalQwenLLM(config=config)
     else:
         raise ValueError(f"Unknown LLM provider: {provider}. Use 'qwen' or 'openai'.")
 
 
-# Global LLM instance - created based on LLM_PROVIDER env var
-llm = create_llm()
+# Global LLM instance - created based on LLM_PROVIDER on first use, not at import
+_llm: BaseLLM | None = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> BaseLLM:
+    """Return the global LLM instance, creating it on first call."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = create_llm()
+    return _llm
+
+
+def __getattr__(name: str):
+    # `from src.core.llm import llm` keeps working, resolved lazily
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,23 +16,15 @@ def merge_str(left: Any, right: Any) -> str:
     - Otherwise keep left value
     - Handles None and empty string cases
     """
-    # Handle None cases
-    if right is None:
-        return left if left is not None else ""
-    if left is None:
-        return right if right else ""
-
-    # Both have values - prefer non-empty right, then non-empty left
-    if right:
-        return right
-    return left if left else ""
+    # Prefer non-empty right, then non-empty left; returns the existing object
+    return right or left or ""
 
 
 def merge_int(left: Any, right: Any) -> int:
     """Reducer for integer fields - keeps the maximum value."""
     left_val = left if isinstance(left, int) else 0
     right_val = right if isinstance(right, int) else 0
-    return max(left_val, right_val)
+    return left_val if left_val >= right_val else right_val
 
 
 class AppGenerationState(TypedDict, total=True):
@@ -69,23 +61,29 @@ class AppGenerationState(TypedDict, total=True):
     iterations: Annotated[int, merge_int]
 
 
+# Template for create_initial_state(); values are immutable, so a shallow copy is safe
+_INITIAL_STATE: AppGenerationState = {
+    "prompt": "",
+    "spec": "",
+    "acceptance_tests": "",
+    "backend_code": "",
+    "frontend_code": "",
+    "qa_findings": "",
+    "test_plan": "",
+    "threat_model": "",
+    "security_requirements": "",
+    "security_findings": "",
+    "docker_compose": "",
+    "ci_config": "",
+    "runbook": "",
+    "status": "started",
+    "iterations": 0,
+    "tasks": ""
+}
+
+
 def create_initial_state(prompt: str) -> AppGenerationState:
     """Create initial state with the given prompt."""
-    return {
-        "prompt": prompt,
-        "spec": "",
-        "acceptance_tests": "",
-        "backend_code": "",
-        "frontend_code": "",
-        "qa_findings": "",
-        "test_plan": "",
-        "threat_model": "",
-        "security_requirements": "",
-        "security_findings": "",
-        "docker_compose": "",
-        "ci_config": "",
-        "runbook": "",
-        "status": "started",
-        "iterations": 0,
-        "tasks": ""
-    }
+    state = _INITIAL_STATE.copy()
+    state["prompt"] = prompt
+    return state
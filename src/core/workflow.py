@@ -27,6 +27,7 @@ ARSITEKTUR:
     Compiled App
          |
          +-- invoke(state)       -> Run workflow
+         +-- ainvoke(state)      -> Run workflow (async, agent.aexecute)
 
 
 CARA KERJA:
@@ -57,6 +58,11 @@ Untuk mengubah workflow:
 
 """
 
+import functools
+import os
+import threading
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
@@ -64,6 +70,17 @@ from .state import AppGenerationState
 from ..agents import registry
 
 
+def _as_node(agent) -> RunnableLambda:
+    """
+    Bungkus agent sebagai node dengan jalur sync dan async.
+
+    invoke() memanggil agent.execute(), sedangkan ainvoke() memanggil
+    agent.aexecute() sehingga branch paralel saling overlap di event loop
+    selama menunggu LLM.
+    """
+    return RunnableLambda(agent.execute, afunc=agent.aexecute, name=agent.agent_id)
+
+
 def create_workflow() -> StateGraph:
     """
     Buat dan konfigurasi LangGraph workflow.
@@ -94,7 +111,7 @@ def create_workflow() -> StateGraph:
     # Agent callable karena mengimplementasikan __call__().
 
     for agent in agents:
-        workflow.add_node(agent.agent_id, agent)
+        workflow.add_node(agent.agent_id, _as_node(agent))
 
     # =========================================================================
     # ADD EDGES
@@ -178,7 +195,7 @@ def create_parallel_workflow() -> StateGraph:
     # =========================================================================
     agents = registry.get_agents()
     for agent in agents:
-        workflow.add_node(agent.agent_id, agent)
+        workflow.add_node(agent.agent_id, _as_node(agent))
 
     # =========================================================================
     # PHASE 1: Sequential (Orchestrator → Product Spec)
@@ -248,17 +265,16 @@ def create_workflow_with_custom_order(agent_order: list) -> StateGraph:
     """
     workflow = StateGraph(AppGenerationState)
 
-    # Add nodes berdasarkan urutan
+    # Add nodes berdasarkan urutan (get_agent = dict lookup, KeyError jika id tidak dikenal)
     for agent_id in agent_order:
-        agent = registry.get_agent(agent_id)
-        workflow.add_node(agent_id, agent)
+        workflow.add_node(agent_id, _as_node(registry.get_agent(agent_id)))
 
     # Set entry point
     workflow.set_entry_point(agent_order[0])
 
-    # Add sequential edges
-    for i in range(len(agent_order) - 1):
-        workflow.add_edge(agent_order[i], agent_order[i + 1])
+    # Add sequential edges: pasangan (agent_i, agent_i+1)
+    for from_id, to_id in zip(agent_order, agent_order[1:]):
+        workflow.add_edge(from_id, to_id)
 
     # Connect last to END
     workflow.add_edge(agent_order[-1], END)
@@ -269,19 +285,49 @@ def create_workflow_with_custom_order(agent_order: list) -> StateGraph:
 # =============================================================================
 # COMPILED WORKFLOW
 # =============================================================================
-# Instance global yang siap digunakan.
+# Instance global yang siap digunakan via get_app() (atau atribut `app`).
 # Import ini dari module lain untuk menjalankan workflow.
 
-# Checkpointer untuk parallel execution - diperlukan untuk state merging
-# saat parallel branches (backend+frontend, test+security+qa) converge
-memory = MemorySaver()
+# State merging saat parallel branches (backend+frontend, test+security+qa)
+# converge dilakukan oleh reducers di AppGenerationState, bukan checkpointer.
+# Checkpointer hanya untuk resume/replay dan menyalin seluruh state di setiap
+# step, jadi opt-in lewat SATGAS_CHECKPOINT=1.
+# Workflow di-compile saat pertama dipakai (get_app()), bukan saat import.
+_app_lock = threading.Lock()
+
+
+def _use_checkpointer() -> bool:
+    """Cek apakah checkpointing diaktifkan lewat env SATGAS_CHECKPOINT."""
+    return os.getenv("SATGAS_CHECKPOINT", "").strip().lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=4)
+def _compiled_parallel_workflow(use_checkpointer: bool):
+    """Compile parallel workflow sekali per varian checkpointer."""
+    checkpointer = MemorySaver() if use_checkpointer else None
+    return create_parallel_workflow().compile(checkpointer=checkpointer)
+
+
+def get_app():
+    """
+    Dapatkan compiled workflow global, di-compile saat pertama dipanggil.
+
+    Hasil compile di-cache, jadi pemanggilan berikutnya (termasuk dari test
+    atau beberapa UI session) tidak membangun ulang StateGraph.
+
+    Gunakan parallel workflow untuk performa optimal.
+    Ganti dengan create_workflow().compile() jika ingin sequential execution.
+    """
+    # Lock: compile hanya sekali walau dipanggil dari beberapa thread
+    with _app_lock:
+        return _compiled_parallel_workflow(_use_checkpointer())
 
-# Gunakan parallel workflow untuk performa optimal
-# Ganti dengan create_workflow() jika ingin sequential execution
-app = create_parallel_workflow().compile(checkpointer=memory)
 
-# Alternative: sequential workflow (tidak perlu checkpointer)
-# app = create_workflow().compile()
+def __getattr__(name: str):
+    # `from src.core.workflow import app` tetap bisa, di-resolve secara lazy
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # =============================================================================
@@ -1,11 +1,39 @@
 """Code formatters for auto-fixing generated code."""
+import functools
+import hashlib
+import os
 import re
 import subprocess
 import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Callable, List
+from typing import Callable, Iterator, List
 
 
+# The fix_* functions are pure str -> str and are memoized: retries often
+# regenerate the same file verbatim
+FIX_CACHE_SIZE = 64
+
+# format_project workers. The per-file phase (run_external=False) is
+# pure-Python, GIL-bound fixing; threads only overlap its file reads and
+# writes, so more threads than cores just add contention. The same pool
+# then runs the few batched black/prettier subprocesses.
+FORMAT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Paths per black/prettier run in format_project; one process formats many
+# files, and batches keep the command line well under ARG_MAX
+EXTERNAL_BATCH_SIZE = 200
+
+# Larger files are left as they are: minified bundles and generated data are
+# not worth running the indenters or black/prettier on
+MAX_FORMAT_BYTES = 2 * 1024 * 1024
+
+# Directories format_project never descends into (dependencies, environments,
+# VCS metadata and bytecode caches)
+_EXCLUDE_DIRS = frozenset({"node_modules", "venv", ".venv", ".git", "__pycache__"})
+
 # Keywords that increase indentation for the next line
 INDENT_KEYWORDS = {
     'def ', 'async def ', 'class ', 'if ', 'elif ', 'else:', 'for ', 'while ',
@@ -13,14 +41,53 @@ INDENT_KEYWORDS = {
     'match ', 'case ',
 }
 
+# Line kinds for fix_python_indentation, keyed by the leading keyword plus
+# the character after it (see _LEADING_KEYWORD_RE). 'cont' marks continuations
+# of a block that dedent before the line (else:, except ..., ...)
+_PY_LINE_KINDS = {
+    'import ': 'import', 'from ': 'import',
+    'class ': 'class', 'def ': 'def', 'if ': 'if',
+    'elif ': 'cont', 'else:': 'cont', 'except:': 'cont', 'except ': 'cont',
+    'finally:': 'cont', 'case ': 'cont',
+}
+_LEADING_KEYWORD_RE = re.compile(r'[a-z]*.?')
+# First characters of the _PY_LINE_KINDS keywords (and 'async'); other lines skip the lookup
+_KEYWORD_FIRST_CHARS = frozenset('acdefi')
+# Statements that end the current block's execution path (bare 'raise' handled separately)
+_BLOCK_ENDERS = ('return', 'raise ', 'raise(', 'break', 'continue')
+# Bracket characters; a line is scanned once and only the (usually empty) residue counted
+_BRACKET_RE = re.compile(r'[()\[\]{}]')
+# Deeper indents than this are built on the fly instead of looked up
+_INDENT_TABLE_SIZE = 32
+# Real line endings only; str.splitlines also splits on U+2028, \x0c, ...
+_LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+
+def _split_lines(content: str) -> List[str]:
+    """Split content into lines, accepting LF, CRLF and CR line endings.
+
+    Only real line endings split: unlike str.splitlines, characters such as
+    U+2028 or form feeds inside string literals are kept in their line. A
+    trailing line break yields a final empty line (as splitting on LF did),
+    so joining the fixed lines keeps the file's trailing newline.
+    """
+    return _LINE_BREAK_RE.split(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _indent_table(unit: str) -> tuple:
+    """Prebuilt indent prefixes: index k holds unit repeated k times."""
+    return tuple(unit * k for k in range(_INDENT_TABLE_SIZE))
+
 
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
     """Fix missing indentation in Python code.
 
     This function adds proper 4-space indentation to Python code that was
-    generated without indentation. It uses a two-pass approach:
-    1. First pass: identify which lines should be at top level (indent 0)
-    2. Second pass: apply indentation based on structure
+    generated without indentation. It works in a single pass, deciding for
+    each line whether it belongs at top level (indent 0) and then applying
+    indentation based on structure.
 
     Args:
         content: Python source code, possibly without proper indentation
@@ -30,68 +97,13 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
     Returns:
         Python source code with proper indentation
     """
-    lines = content.split('\n')
+    lines = _split_lines(content)
+    indents = _indent_table('    ')
 
-    # First pass: identify top-level lines
-    # Top-level: imports, decorators followed by def/class, class definitions
-    # BUT NOT: methods inside classes (def inside class body)
-    top_level_indices = set()
-    decorator_start = None
+    result = [None] * len(lines)
+    # Top-level tracking: imports, decorators followed by def/class, class
+    # definitions are top-level, BUT NOT methods inside classes (def inside class body)
     in_class_body = False
-    class_body_indent = 0
-
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if not stripped:
-            continue
-
-        # If line already has indentation and we're trusting it
-        existing_indent = len(line) - len(line.lstrip())
-        if existing_indent > 0 and trust_existing:
-            # If we're in a class body and see indentation, continue tracking
-            if in_class_body and existing_indent <= class_body_indent:
-                in_class_body = False
-            continue
-        # Otherwise, analyze the stripped line content
-
-        # Imports are always top-level
-        if stripped.startswith(('import ', 'from ')):
-            top_level_indices.add(i)
-            in_class_body = False
-
-        # Decorators at top level (not inside class)
-        elif stripped.startswith('@'):
-            if not in_class_body:
-                if decorator_start is None:
-                    decorator_start = i
-                top_level_indices.add(i)
-
-        # class definition is always top-level (unless nested, which is rare)
-        elif stripped.startswith('class '):
-            top_level_indices.add(i)
-            decorator_start = None
-            in_class_body = True  # Next lines are class body
-            class_body_indent = 1  # Class body is at indent level 1
-
-        # def: top-level only if NOT in class body
-        elif stripped.startswith(('def ', 'async def ')):
-            if not in_class_body:
-                if decorator_start is not None:
-                    top_level_indices.add(i)
-                    decorator_start = None
-                else:
-                    top_level_indices.add(i)
-            else:
-                # Method inside class - don't mark as top-level
-                decorator_start = None
-
-        # Other statements: if we see them after class:, we're still in class body
-        # until we see a new top-level construct
-        else:
-            decorator_start = None
-
-    # Second pass: apply indentation
-    result = []
     indent_level = 0
     paren_depth = 0
     bracket_depth = 0
@@ -109,18 +121,22 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
 
         # Skip empty lines but reset tracking flags
         if not stripped:
-            result.append('')
+            result[i] = ''
             prev_was_block_ender = False
             prev_was_block_header = False
             continue
 
-        # Check if line already has indentation
-        existing_indent = len(line) - len(line.lstrip())
-        if existing_indent > 0 and trust_existing:
-            # Trust existing indentation if flag is set
-            result.append(line)
+        # Check if line already has indentation (its first character was
+        # stripped); the width is only measured when it will be trusted
+        if trust_existing and line[0] != stripped[0]:
+            existing_indent = len(line) - len(line.lstrip())
+            # Trust existing indentation if flag is set; a line at most one
+            # level deep ends the class body being tracked
+            if in_class_body and existing_indent <= 1:
+                in_class_body = False
+            result[i] = line
             indent_level = existing_indent // 4
-            if stripped.endswith(':') and not stripped.startswith('#'):
+            if stripped[-1] == ':' and stripped[0] != '#':
                 indent_level += 1
             continue
         # Otherwise, ignore existing indent and recalculate
@@ -129,23 +145,58 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
         was_in_multiline = (paren_depth > 0 or bracket_depth > 0 or brace_depth > 0)
 
         # Track multi-line expressions - count before processing this line
-        line_opens = stripped.count('(') + stripped.count('[') + stripped.count('{')
-        line_closes = stripped.count(')') + stripped.count(']') + stripped.count('}')
+        # Scan the line once for brackets; most lines have none
+        brackets = ''.join(_BRACKET_RE.findall(stripped))
+        if brackets:
+            opens_p, closes_p = brackets.count('('), brackets.count(')')
+            opens_b, closes_b = brackets.count('['), brackets.count(']')
+            opens_c, closes_c = brackets.count('{'), brackets.count('}')
+            line_opens = opens_p + opens_b + opens_c
+            line_closes = closes_p + closes_b + closes_c
+        else:
+            line_opens = line_closes = 0
+
+        # Classify the line once with a single table lookup; the state machine
+        # below only tests these flags
+        kind = None
+        if stripped[0] in _KEYWORD_FIRST_CHARS:
+            head = _LEADING_KEYWORD_RE.match(stripped).group()
+            kind = _PY_LINE_KINDS.get(head)
+            if head == 'async ' and stripped.startswith('async def '):
+                kind = 'def'
+        is_class = kind == 'class'
+        is_def = kind == 'def'
+        is_if = kind == 'if'
+        is_decorator = stripped[0] == '@'
+        is_block_continuation = kind == 'cont'
+        ends_colon = stripped[-1] == ':'
+        is_header = ends_colon and stripped[0] != '#'
+
+        # Decide whether this line is top-level. class definitions always are
+        # (unless nested, which is rare); decorators and def only outside a class body
+        if kind == 'import':
+            is_top_level = True
+            in_class_body = False
+        elif is_class:
+            is_top_level = True
+            in_class_body = True  # Next lines are class body
+        else:
+            is_top_level = not in_class_body and (is_def or is_decorator)
 
-        # If this is marked as top-level, reset indent
-        if i in top_level_indices:
+        # If this is top-level, reset indent
+        if is_top_level:
             indent_level = 0
             base_indent = 0
             function_body_indent = None  # Reset when at top level
             class_body_indent = None  # Reset when at top level
 
         # Track class body indent level
-        if stripped.startswith('class '):
+        if is_class:
             class_body_indent = indent_level + 1
             function_body_indent = None  # Reset function tracking when entering a new class
 
         # Handle method/function definitions
-        if stripped.startswith(('def ', 'async def ')):
+        if is_def:
             # If we're inside a class, reset to class body level for this method
             if class_body_indent is not None and indent_level > class_body_indent:
                 indent_level = class_body_indent
@@ -154,7 +205,6 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
         # After an if block's single statement body, dedent for subsequent lines
         # This makes statements after `if x: stmt` be at the same level as the if
         if prev_was_if_body and not prev_was_block_header and not was_in_multiline:
-            is_block_continuation = stripped.startswith(('elif ', 'else:', 'except:', 'except ', 'finally:', 'case '))
             if not is_block_continuation and if_body_indent is not None:
                 indent_level = if_body_indent
                 prev_was_if_body = False
@@ -163,8 +213,6 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
         # because these statements end the current block's execution path
         # But NOT if we're at top-level (starting a new function/class)
         if prev_was_block_ender and not prev_was_block_header and not was_in_multiline:
-            is_block_continuation = stripped.startswith(('elif ', 'else:', 'except:', 'except ', 'finally:', 'case '))
-            is_top_level = i in top_level_indices
             if not is_block_continuation and not is_top_level and function_body_indent is not None:
                 indent_level = function_body_indent
             prev_was_block_ender = False
@@ -173,13 +221,13 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
         # When we see 'if' (not elif) that's not immediately after a block header,
         # reset to function body level. This makes consecutive ifs siblings.
         if not prev_was_block_header and not was_in_multiline:
-            if stripped.startswith('if '):
+            if is_if:
                 # This is a standalone 'if', make it a sibling at function body level
                 if function_body_indent is not None and indent_level > function_body_indent:
                     indent_level = function_body_indent
 
         # Handle else/elif/except/finally - dedent first
-        if stripped.startswith(('else:', 'elif ', 'except:', 'except ', 'finally:', 'case ')):
+        if is_block_continuation:
             indent_level = max(0, indent_level - 1)
 
         # Determine indent for this line
@@ -190,28 +238,45 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
             current_indent = indent_level
 
         # Add the line with proper indentation
-        result.append('    ' * current_indent + stripped)
-
-        # Update paren tracking AFTER processing the line
-        for char in stripped:
-            if char == '(':
-                if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
-                    base_indent = indent_level
-                paren_depth += 1
-            elif char == ')':
-                paren_depth = max(0, paren_depth - 1)
-            elif char == '[':
-                if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
-                    base_indent = indent_level
-                bracket_depth += 1
-            elif char == ']':
-                bracket_depth = max(0, bracket_depth - 1)
-            elif char == '{':
-                if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
+        if current_indent < _INDENT_TABLE_SIZE:
+            result[i] = indents[current_indent] + stripped
+        else:
+            result[i] = '    ' * current_indent + stripped
+
+        # Update paren tracking AFTER processing the line. Lines that only open
+        # or only close brackets are settled from the counts above; only lines
+        # mixing both need the ordered walk (over bracket characters only)
+        if not line_closes:
+            if line_opens:
+                if not was_in_multiline:
                     base_indent = indent_level
-                brace_depth += 1
-            elif char == '}':
-                brace_depth = max(0, brace_depth - 1)
+                paren_depth += opens_p
+                bracket_depth += opens_b
+                brace_depth += opens_c
+        elif not line_opens:
+            paren_depth = max(0, paren_depth - closes_p)
+            bracket_depth = max(0, bracket_depth - closes_b)
+            brace_depth = max(0, brace_depth - closes_c)
+        else:
+            for char in brackets:
+                if char == '(':
+                    if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
+                        base_indent = indent_level
+                    paren_depth += 1
+                elif char == ')':
+                    paren_depth = max(0, paren_depth - 1)
+                elif char == '[':
+                    if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
+                        base_indent = indent_level
+                    bracket_depth += 1
+                elif char == ']':
+                    bracket_depth = max(0, bracket_depth - 1)
+                elif char == '{':
+                    if paren_depth == 0 and bracket_depth == 0 and brace_depth == 0:
+                        base_indent = indent_level
+                    brace_depth += 1
+                elif char == '}':
+                    brace_depth = max(0, brace_depth - 1)
 
         in_multiline = (paren_depth > 0 or bracket_depth > 0 or brace_depth > 0)
 
@@ -220,40 +285,44 @@ def fix_python_indentation(content: str, trust_existing: bool = False) -> str:
             indent_level = base_indent
 
         # Decorators don't change indentation for next line
-        if stripped.startswith('@'):
+        if is_decorator:
             continue
 
-        # Lines ending with colon increase indent for next line
-        if stripped.endswith(':') and not stripped.startswith('#') and not in_multiline:
+        # Lines ending with colon (outside brackets) open a block: they
+        # increase indent for next line
+        opens_block = is_header and not in_multiline
+        if opens_block:
             indent_level += 1
             # Track if we're entering an if block (for single-statement body detection)
-            if stripped.startswith('if '):
+            if is_if:
                 if_body_indent = indent_level - 1  # The level of the if statement itself
 
         # Track if this line was inside an if body (the single statement after if:)
-        if prev_was_block_header and stripped.startswith('if '):
+        if prev_was_block_header and is_if:
             # Previous line was the if:, this line is NOT the body (it's another if)
             prev_was_if_body = False
         elif prev_was_block_header:
             # Previous line was a : line, check if it was an if
             # We'll set this flag for the NEXT iteration to detect
             prev_was_if_body = True
-        elif not stripped.endswith(':'):
+        elif not ends_colon:
             # Regular statement, if we were tracking if body, keep it for one more line
             pass
         else:
             prev_was_if_body = False
 
         # Track if this line ended with ':' for next iteration
-        prev_was_block_header = stripped.endswith(':') and not stripped.startswith('#') and not in_multiline
+        prev_was_block_header = opens_block
 
         # Track if this line was a block-ending statement (return/raise/break/continue)
-        block_enders = ('return', 'return ', 'raise ', 'raise(', 'break', 'continue')
-        prev_was_block_ender = any(stripped.startswith(be) or stripped == be.strip() for be in block_enders)
+        prev_was_block_ender = stripped[0] in 'rbc' and (
+            stripped.startswith(_BLOCK_ENDERS) or stripped == 'raise'
+        )
 
     return '\n'.join(result)
 
 
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_js_indentation(content: str, indent_size: int = 2) -> str:
     """Fix missing indentation in JavaScript/TypeScript code.
 
@@ -268,58 +337,59 @@ def fix_js_indentation(content: str, indent_size: int = 2) -> str:
     Returns:
         JavaScript/TypeScript source code with proper indentation
     """
-    lines = content.split('\n')
-    result = []
+    lines = _split_lines(content)
+    indents = _indent_table(' ' * indent_size)
+    result = [None] * len(lines)
     indent_level = 0
 
     # Track if we're inside a string (to avoid counting braces in strings)
     in_string = False
     string_char = None
 
-    for line in lines:
+    for i, line in enumerate(lines):
         stripped = line.strip()
 
         # Skip empty lines
         if not stripped:
-            result.append('')
+            result[i] = ''
             continue
 
         # Check if line already has indentation - if so, trust it
-        existing_indent = len(line) - len(line.lstrip())
-        if existing_indent > 0:
-            result.append(line)
+        if line[0] != stripped[0]:
+            result[i] = line
             # Update indent level based on braces in this line
             open_braces = stripped.count('{') + stripped.count('[') + stripped.count('(')
             close_braces = stripped.count('}') + stripped.count(']') + stripped.count(')')
-            indent_level = existing_indent // indent_size
-            indent_level += open_braces - close_braces
-            indent_level = max(0, indent_level)
+            existing_indent = len(line) - len(line.lstrip())
+            indent_level = max(0, existing_indent // indent_size + open_braces - close_braces)
             continue
 
         # Count opening and closing braces (simplified - doesn't handle strings perfectly)
-        open_braces = stripped.count('{') + stripped.count('[') + stripped.count('(')
-        close_braces = stripped.count('}') + stripped.count(']') + stripped.count(')')
+        # Net change for the next line = opens - closes
+        net_change = (
+            stripped.count('{') + stripped.count('[') + stripped.count('(')
+            - stripped.count('}') - stripped.count(']') - stripped.count(')')
+        )
 
         # If line starts with closing brace, dedent first
         if stripped[0] in '}])':
             indent_level = max(0, indent_level - 1)
+            # We already dedented, so add back one for the leading close we counted
+            net_change += 1
 
         # Add the line with proper indentation
-        result.append(' ' * (indent_size * indent_level) + stripped)
+        if indent_level < _INDENT_TABLE_SIZE:
+            result[i] = indents[indent_level] + stripped
+        else:
+            result[i] = ' ' * (indent_size * indent_level) + stripped
 
         # Update indent level for next line
-        # Net change = opens - closes, but we already dedented for leading close
-        net_change = open_braces - close_braces
-        if stripped[0] in '}])':
-            # We already dedented, so add back one for the leading close we counted
-            net_change += 1
-
-        indent_level += net_change
-        indent_level = max(0, indent_level)
+        indent_level = max(0, indent_level + net_change)
 
     return '\n'.join(result)
 
 
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_pydantic_config(content: str) -> str:
     """Fix Pydantic Config class that's wrongly placed outside Response class.
 
@@ -337,8 +407,16 @@ def fix_pydantic_config(content: str) -> str:
             class Config:  # CORRECT - inside class
                 from_attributes = True
     """
-    lines = content.split('\n')
+    # Most files have no Config class at all: skip the split and rebuild
+    if 'class Config:' not in content:
+        return content
+
+    lines = _split_lines(content)
     fixed_lines = []
+    append = fixed_lines.append  # Output length varies; bind once for the loop
+    # Whether a Response class has been emitted so far, tracked forward
+    # instead of scanning back through fixed_lines
+    response_class_seen = False
     i = 0
 
     while i < len(lines):
@@ -346,54 +424,56 @@ def fix_pydantic_config(content: str) -> str:
         stripped = line.strip()
 
         # Check if this is a standalone "class Config:" at column 0
-        if stripped.startswith('class Config:') and not line.startswith(' ') and not line.startswith('\t'):
-            # Look back to find the Response class this should belong to
-            for j in range(len(fixed_lines) - 1, -1, -1):
-                prev_line = fixed_lines[j].strip()
-                if prev_line.startswith('class ') and 'Response' in prev_line:
-                    # Found a Response class - indent this Config and its body
-                    if fixed_lines and fixed_lines[-1].strip():
-                        fixed_lines.append('')
-                    fixed_lines.append('    class Config:')
-
-                    # Indent all following lines that are part of Config
-                    i += 1
-                    while i < len(lines):
-                        next_line = lines[i]
-                        next_stripped = next_line.strip()
-
-                        # Stop if we hit another class definition
-                        if next_stripped.startswith('class ') and not next_stripped.startswith('class Config'):
-                            i -= 1
-                            break
-
-                        # Stop if we hit a non-indented non-empty line (not part of Config)
-                        if next_stripped and not next_line.startswith(' ') and not next_line.startswith('\t'):
-                            if not next_stripped.startswith('from_attributes') and not next_stripped.startswith('orm_mode'):
-                                i -= 1
-                                break
-
-                        # Indent the content
-                        if next_stripped:
-                            fixed_lines.append('        ' + next_stripped)
-                        else:
-                            fixed_lines.append('')
-                        i += 1
+        if stripped.startswith('class Config:') and not line.startswith(' ') and not line.startswith('\t') and response_class_seen:
+            # A Response class precedes it - indent this Config and its body
+            if fixed_lines and fixed_lines[-1].strip():
+                append('')
+            append('    class Config:')
+
+            # Indent all following lines that are part of Config
+            i += 1
+            while i < len(lines):
+                next_line = lines[i]
+                next_stripped = next_line.strip()
+
+                # Stop if we hit another class definition
+                if next_stripped.startswith('class ') and not next_stripped.startswith('class Config'):
+                    i -= 1
                     break
-            else:
-                # No Response class found, keep as is
-                fixed_lines.append(line)
+
+                # Stop if we hit a non-indented non-empty line (not part of Config)
+                if next_stripped and not next_line.startswith(' ') and not next_line.startswith('\t'):
+                    if not next_stripped.startswith('from_attributes') and not next_stripped.startswith('orm_mode'):
+                        i -= 1
+                        break
+
+                # Indent the content
+                if next_stripped:
+                    append('        ' + next_stripped)
+                    if next_stripped.startswith('class ') and 'Response' in next_stripped:
+                        response_class_seen = True
+                else:
+                    append('')
+                i += 1
         else:
-            fixed_lines.append(line)
+            # Not a misplaced Config (or no Response class yet), keep as is
+            append(line)
+            if stripped.startswith('class ') and 'Response' in stripped:
+                response_class_seen = True
         i += 1
 
     return '\n'.join(fixed_lines)
 
 
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_settings_instantiation(content: str) -> str:
     """Fix Settings() instantiation that's wrongly placed inside Settings class."""
-    lines = content.split('\n')
+    if 'class Settings' not in content:
+        return content
+
+    lines = _split_lines(content)
     fixed_lines = []
+    append = fixed_lines.append
     settings_line = None
     in_settings_class = False
 
@@ -402,7 +482,7 @@ def fix_settings_instantiation(content: str) -> str:
 
         if stripped.startswith('class Settings'):
             in_settings_class = True
-            fixed_lines.append(line)
+            append(line)
             continue
 
         if in_settings_class and stripped.startswith('class ') and not line.startswith(' ') and not line.startswith('\t'):
@@ -412,40 +492,43 @@ def fix_settings_instantiation(content: str) -> str:
             settings_line = 'settings = Settings()'
             continue
 
-        fixed_lines.append(line)
+        append(line)
 
     if settings_line:
         if fixed_lines and fixed_lines[-1].strip():
-            fixed_lines.append('')
-        fixed_lines.append('')
-        fixed_lines.append(settings_line)
+            append('')
+        append('')
+        append(settings_line)
 
     return '\n'.join(fixed_lines)
 
 
+# Top-level keys that should have 0 indent
+_YAML_TOP_LEVEL_KEYS = frozenset({
+    'version', 'services', 'volumes', 'networks', 'name', 'on', 'jobs',
+    'env', 'defaults', 'permissions', 'concurrency'
+})
+
+# Keys that indicate a new nested block (their children need more indent)
+_YAML_BLOCK_KEYS = frozenset({
+    'services', 'volumes', 'networks', 'on', 'jobs', 'steps', 'env',
+    'build', 'environment', 'ports', 'depends_on', 'with', 'strategy',
+    'matrix', 'container', 'options', 'outputs', 'inputs', 'secrets'
+})
+
+
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_yaml_indentation(content: str) -> str:
     """Fix missing indentation in YAML files (docker-compose.yml, ci.yml).
 
     YAML uses 2-space indentation where each nested level adds 2 spaces.
     This function reconstructs proper indentation based on YAML structure.
     """
-    lines = content.split('\n')
-    result = []
-    indent_stack = [0]  # Stack of indent levels
-
-    # Top-level keys that should have 0 indent
-    top_level_keys = {
-        'version', 'services', 'volumes', 'networks', 'name', 'on', 'jobs',
-        'env', 'defaults', 'permissions', 'concurrency'
-    }
-
-    # Keys that indicate a new nested block (their children need more indent)
-    block_keys = {
-        'services', 'volumes', 'networks', 'on', 'jobs', 'steps', 'env',
-        'build', 'environment', 'ports', 'depends_on', 'with', 'strategy',
-        'matrix', 'container', 'options', 'outputs', 'inputs', 'secrets'
-    }
+    lines = _split_lines(content)
+    result = [None] * len(lines)
+    indent_stack = [0]  # Stack of indent levels (never empty)
 
+    last_nonempty = ''  # Previous non-empty stripped line
     i = 0
     while i < len(lines):
         line = lines[i]
@@ -453,14 +536,15 @@ def fix_yaml_indentation(content: str) -> str:
 
         # Skip empty lines
         if not stripped:
-            result.append('')
+            result[i] = ''
             i += 1
             continue
 
         # Skip comments but preserve them at current indent
         if stripped.startswith('#'):
-            current_indent = indent_stack[-1] if indent_stack else 0
-            result.append('  ' * current_indent + stripped)
+            current_indent = indent_stack[-1]
+            result[i] = '  ' * current_indent + stripped
+            last_nonempty = stripped
             i += 1
             continue
 
@@ -469,63 +553,85 @@ def fix_yaml_indentation(content: str) -> str:
 
         # Extract the key if this is a key: value line
         key = None
-        if ':' in stripped and not is_list_item:
-            key = stripped.split(':')[0].strip()
-        elif is_list_item and ':' in stripped:
+        if not is_list_item:
+            head, sep, _ = stripped.partition(':')
+            if sep:
+                key = head.strip()
+        else:
             # List item with key like "- name: something"
-            after_dash = stripped[1:].strip()
-            if ':' in after_dash:
-                key = after_dash.split(':')[0].strip()
+            head, sep, _ = stripped[1:].partition(':')
+            if sep:
+                key = head.strip()
 
         # Determine the correct indent level
-        if key and key in top_level_keys:
+        if key and key in _YAML_TOP_LEVEL_KEYS:
             # Top-level keys always at indent 0
             indent_stack = [0]
-            result.append(stripped)
+            result[i] = stripped
         elif is_list_item:
             # List items: use current indent level
-            current_indent = indent_stack[-1] if indent_stack else 0
-            result.append('  ' * current_indent + stripped)
+            current_indent = indent_stack[-1]
+            result[i] = '  ' * current_indent + stripped
 
             # If list item has nested content (like steps), push indent
             if stripped.endswith(':'):
                 indent_stack.append(current_indent + 2)
         elif key:
             # Key: value line
-            current_indent = indent_stack[-1] if indent_stack else 0
+            current_indent = indent_stack[-1]
 
             # Check if previous non-empty line was a block key ending with :
             # If so, this should be nested under it
-            prev_was_block = False
-            for j in range(len(result) - 1, -1, -1):
-                prev_stripped = result[j].strip()
-                if prev_stripped:
-                    if prev_stripped.endswith(':') and not prev_stripped.startswith('-'):
-                        prev_was_block = True
-                    break
+            prev_was_block = last_nonempty.endswith(':') and not last_nonempty.startswith('-')
 
             if prev_was_block and current_indent > 0:
                 # Already at correct level from previous block
                 pass
-            elif key in block_keys:
+            elif key in _YAML_BLOCK_KEYS:
                 # Block keys at current level
                 pass
 
-            result.append('  ' * current_indent + stripped)
+            result[i] = '  ' * current_indent + stripped
 
             # If this line ends with :, next level needs more indent
             if stripped.endswith(':'):
                 indent_stack.append(current_indent + 1)
         else:
             # Other lines (values, etc.)
-            current_indent = indent_stack[-1] if indent_stack else 0
-            result.append('  ' * current_indent + stripped)
+            current_indent = indent_stack[-1]
+            result[i] = '  ' * current_indent + stripped
 
+        last_nonempty = stripped
         i += 1
 
     return '\n'.join(result)
 
 
+# Top-level ONLY keys (never appear inside services)
+_COMPOSE_TOP_LEVEL_ONLY_KEYS = frozenset({'version', 'services'})
+
+# Keys that can be both top-level AND service-level
+# We need lookahead to decide
+_COMPOSE_AMBIGUOUS_KEYS = frozenset({'volumes', 'networks'})
+
+# Service-level keys (directly under service name)
+_COMPOSE_SERVICE_KEYS = frozenset({
+    'build', 'ports', 'environment', 'volumes', 'networks', 'depends_on',
+    'image', 'container_name', 'restart', 'command', 'expose', 'labels',
+    'healthcheck', 'deploy', 'logging', 'ulimits', 'sysctls', 'cap_add',
+    'cap_drop', 'devices', 'dns', 'entrypoint', 'env_file', 'extra_hosts',
+    'hostname', 'init', 'ipc', 'isolation', 'links', 'network_mode', 'pid',
+    'platform', 'privileged', 'profiles', 'pull_policy', 'read_only',
+    'runtime', 'scale', 'security_opt', 'shm_size', 'stdin_open',
+    'stop_grace_period', 'stop_signal', 'storage_opt', 'tmpfs', 'tty',
+    'user', 'userns_mode', 'working_dir'
+})
+
+# Keys that are nested under 'build:'
+_COMPOSE_BUILD_KEYS = frozenset({'context', 'dockerfile', 'args', 'target', 'cache_from', 'network', 'labels'})
+
+
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_docker_compose_yaml(content: str) -> str:
     """Fix docker-compose.yml specific indentation.
 
@@ -543,39 +649,18 @@ def fix_docker_compose_yaml(content: str) -> str:
       app-network:        # 2 spaces
         driver: bridge    # 4 spaces
     """
-    lines = content.split('\n')
-    result = []
-
-    # Top-level ONLY keys (never appear inside services)
-    top_level_only_keys = {'version', 'services'}
-
-    # Keys that can be both top-level AND service-level
-    # We need lookahead to decide
-    ambiguous_keys = {'volumes', 'networks'}
-
-    # Service-level keys (directly under service name)
-    service_keys = {
-        'build', 'ports', 'environment', 'volumes', 'networks', 'depends_on',
-        'image', 'container_name', 'restart', 'command', 'expose', 'labels',
-        'healthcheck', 'deploy', 'logging', 'ulimits', 'sysctls', 'cap_add',
-        'cap_drop', 'devices', 'dns', 'entrypoint', 'env_file', 'extra_hosts',
-        'hostname', 'init', 'ipc', 'isolation', 'links', 'network_mode', 'pid',
-        'platform', 'privileged', 'profiles', 'pull_policy', 'read_only',
-        'runtime', 'scale', 'security_opt', 'shm_size', 'stdin_open',
-        'stop_grace_period', 'stop_signal', 'storage_opt', 'tmpfs', 'tty',
-        'user', 'userns_mode', 'working_dir'
-    }
-
-    # Keys that are nested under 'build:'
-    build_keys = {'context', 'dockerfile', 'args', 'target', 'cache_from', 'network', 'labels'}
-
-    # Helper: look ahead to see if next non-empty line starts with '-' (list item)
-    def next_is_list_item(idx):
-        for j in range(idx + 1, len(lines)):
-            next_stripped = lines[j].strip()
-            if next_stripped:
-                return next_stripped.startswith('-')
-        return False
+    lines = _split_lines(content)
+    result = [None] * len(lines)
+
+    # Lookahead: next_is_list_item[i] tells whether the next non-empty line
+    # after i starts with '-' (list item), filled in one reverse pass
+    next_is_list_item = [False] * len(lines)
+    next_dash = False
+    for j in range(len(lines) - 1, -1, -1):
+        next_is_list_item[j] = next_dash
+        next_stripped = lines[j].strip()
+        if next_stripped:
+            next_dash = next_stripped.startswith('-')
 
     # Track context
     section = None  # 'services', 'volumes', 'networks'
@@ -586,17 +671,20 @@ def fix_docker_compose_yaml(content: str) -> str:
         stripped = line.strip()
 
         if not stripped:
-            result.append('')
+            result[i] = ''
             continue
 
-        # Extract key if this is a key: line
-        key = None
-        if ':' in stripped:
-            key = stripped.split(':')[0].strip()
+        # Extract key if this is a key: line; count colons once for the checks below
+        head, sep, _ = stripped.partition(':')
+        key = head.strip() if sep else None
+        colon_count = stripped.count(':')
+        ends_colon = stripped[-1] == ':'
+        # A bare "name:" line (service, volume or network name)
+        is_name_line = ends_colon and colon_count == 1
 
         # Check for top-level ONLY keys (0 indent) - always top-level
-        if key and key in top_level_only_keys:
-            result.append(stripped)
+        if key and key in _COMPOSE_TOP_LEVEL_ONLY_KEYS:
+            result[i] = stripped
             section = key
             in_service = False
             in_build = False
@@ -605,16 +693,16 @@ def fix_docker_compose_yaml(content: str) -> str:
         # Handle ambiguous keys (volumes:, networks:)
         # If followed by list item -> service-level
         # If followed by a name ending with : -> top-level section
-        if key and key in ambiguous_keys and stripped == f'{key}:':
+        if key and key in _COMPOSE_AMBIGUOUS_KEYS and stripped == f'{key}:':
             if section == 'services' and in_service:
                 # Check next line to decide
-                if next_is_list_item(i):
+                if next_is_list_item[i]:
                     # Service-level: volumes: or networks: with list items
-                    result.append('    ' + stripped)  # 4 spaces (service level)
+                    result[i] = '    ' + stripped  # 4 spaces (service level)
                     in_build = False
                     continue
             # Top-level section
-            result.append(stripped)
+            result[i] = stripped
             section = key
             in_service = False
             in_build = False
@@ -624,13 +712,12 @@ def fix_docker_compose_yaml(content: str) -> str:
         if section == 'services':
             # Service name detection: ends with : and no other colons, and key is NOT a service_key
             is_service_name = (
-                stripped.endswith(':') and
-                stripped.count(':') == 1 and
-                key and key not in service_keys and key not in build_keys
+                is_name_line and
+                key and key not in _COMPOSE_SERVICE_KEYS and key not in _COMPOSE_BUILD_KEYS
             )
 
             if is_service_name:
-                result.append('  ' + stripped)  # 2 spaces - service name
+                result[i] = '  ' + stripped  # 2 spaces - service name
                 in_service = True
                 in_build = False
                 continue
@@ -638,57 +725,88 @@ def fix_docker_compose_yaml(content: str) -> str:
             if in_service:
                 # Check if this is a build: key
                 if key == 'build':
-                    result.append('    ' + stripped)  # 4 spaces
-                    in_build = stripped.endswith(':')  # Only if it's "build:" not "build: ./dir"
+                    result[i] = '    ' + stripped  # 4 spaces
+                    in_build = ends_colon  # Only if it's "build:" not "build: ./dir"
                     continue
 
                 # Check if this is under build:
-                if in_build and key in build_keys:
-                    result.append('      ' + stripped)  # 6 spaces
+                if in_build and key in _COMPOSE_BUILD_KEYS:
+                    result[i] = '      ' + stripped  # 6 spaces
                     continue
 
                 # Service-level keys reset in_build
-                if key in service_keys:
-                    result.append('    ' + stripped)  # 4 spaces
+                if key in _COMPOSE_SERVICE_KEYS:
+                    result[i] = '    ' + stripped  # 4 spaces
                     in_build = False
                     continue
 
                 # List items
                 if stripped.startswith('-'):
-                    result.append('      ' + stripped)  # 6 spaces
+                    result[i] = '      ' + stripped  # 6 spaces
                     continue
 
                 # Other content inside service
                 if in_build:
-                    result.append('      ' + stripped)  # 6 spaces (under build)
+                    result[i] = '      ' + stripped  # 6 spaces (under build)
                 else:
-                    result.append('    ' + stripped)  # 4 spaces (under service)
+                    result[i] = '    ' + stripped  # 4 spaces (under service)
                 continue
 
         # Handle volumes section
         if section == 'volumes':
             # Volume name: ends with : only
-            if stripped.endswith(':') and stripped.count(':') == 1:
-                result.append('  ' + stripped)  # 2 spaces
+            if is_name_line:
+                result[i] = '  ' + stripped  # 2 spaces
             else:
-                result.append('    ' + stripped)  # 4 spaces
+                result[i] = '    ' + stripped  # 4 spaces
             continue
 
         # Handle networks section
         if section == 'networks':
             # Network name: ends with : only
-            if stripped.endswith(':') and stripped.count(':') == 1:
-                result.append('  ' + stripped)  # 2 spaces
+            if is_name_line:
+                result[i] = '  ' + stripped  # 2 spaces
             else:
-                result.append('    ' + stripped)  # 4 spaces
+                result[i] = '    ' + stripped  # 4 spaces
             continue
 
         # Fallback
-        result.append(stripped)
+        result[i] = stripped
 
     return '\n'.join(result)
 
 
+# Job-level keys (directly under job name)
+_GHA_JOB_KEYS = frozenset({
+    'runs-on', 'needs', 'if', 'steps', 'services', 'container', 'env',
+    'environment', 'outputs', 'strategy', 'timeout-minutes', 'continue-on-error',
+    'permissions', 'concurrency', 'defaults', 'uses', 'with', 'secrets'
+})
+
+# Service-level keys (under services.service_name)
+_GHA_SERVICE_KEYS = frozenset({'image', 'ports', 'env', 'options', 'volumes', 'credentials'})
+# Service keys that end a service's env: block
+_GHA_SERVICE_KEYS_AFTER_ENV = _GHA_SERVICE_KEYS - {'env'}
+
+# Step item keys (under each - item in steps)
+_GHA_STEP_ITEM_KEYS = frozenset({'uses', 'with', 'run', 'name', 'id', 'if', 'env', 'continue-on-error', 'timeout-minutes', 'shell', 'working-directory'})
+# Step keys that end a with: block
+_GHA_STEP_ITEM_KEYS_AFTER_WITH = _GHA_STEP_ITEM_KEYS - {'with'}
+
+# Top-level section lines and the section each one opens
+_GHA_SECTION_LINES = {'on:': 'on', 'jobs:': 'jobs', 'env:': 'env', 'permissions:': 'permissions'}
+
+# Block lines directly under a job that switch the sub-section
+_GHA_JOB_BLOCK_LINES = frozenset({'steps:', 'services:', 'strategy:'})
+
+# Event triggers under 'on:'
+_GHA_TRIGGER_LINES = frozenset({'push:', 'pull_request:', 'workflow_dispatch:', 'schedule:', 'release:'})
+
+# Keys under 'with:'
+_GHA_WITH_KEYS = frozenset({'python-version', 'node-version', 'go-version', 'java-version', 'cache', 'fetch-depth'})
+
+
+@functools.lru_cache(maxsize=FIX_CACHE_SIZE)
 def fix_github_actions_yaml(content: str) -> str:
     """Fix GitHub Actions ci.yml specific indentation.
 
@@ -710,24 +828,8 @@ def fix_github_actions_yaml(content: str) -> str:
               key: value   # 10 spaces
             run: z         # 8 spaces (under list item key)
     """
-    lines = content.split('\n')
-    result = []
-
-    # Job-level keys (directly under job name)
-    job_keys = {
-        'runs-on', 'needs', 'if', 'steps', 'services', 'container', 'env',
-        'environment', 'outputs', 'strategy', 'timeout-minutes', 'continue-on-error',
-        'permissions', 'concurrency', 'defaults', 'uses', 'with', 'secrets'
-    }
-
-    # Service-level keys (under services.service_name)
-    service_keys = {'image', 'ports', 'env', 'options', 'volumes', 'credentials'}
-
-    # Step item keys (under each - item in steps)
-    step_item_keys = {'uses', 'with', 'run', 'name', 'id', 'if', 'env', 'continue-on-error', 'timeout-minutes', 'shell', 'working-directory'}
-
-    # Keys under 'with:'
-    with_keys = {'python-version', 'node-version', 'go-version', 'java-version', 'cache', 'fetch-depth'}
+    lines = _split_lines(content)
+    result = [None] * len(lines)
 
     # Track context
     section = None  # 'on', 'jobs', 'env', etc.
@@ -745,128 +847,117 @@ def fix_github_actions_yaml(content: str) -> str:
         stripped = line.strip()
 
         if not stripped:
-            result.append('')
+            result[i] = ''
             continue
 
-        # Extract key
+        # Per-line facts shared by every section's checks below
+        starts_dash = stripped[0] == '-'
         key = None
-        if ':' in stripped and not stripped.startswith('-'):
-            key = stripped.split(':')[0].strip()
+        if not starts_dash:
+            head, sep, _ = stripped.partition(':')
+            if sep:
+                key = head.strip()
+        # A bare "name:" line (job or service name)
+        is_name_line = stripped[-1] == ':' and stripped.count(':') == 1
 
         # Top-level keys
         if stripped.startswith('name:'):
-            result.append(stripped)
+            result[i] = stripped
             section = None
             in_job = in_services = in_service = in_steps = in_step_item = in_with = False
             continue
 
-        if stripped == 'on:':
-            result.append('on:')
-            section = 'on'
+        # on:/jobs: always open their section; env:/permissions: only at top level
+        new_section = _GHA_SECTION_LINES.get(stripped)
+        if new_section in ('on', 'jobs'):
+            result[i] = stripped
+            section = new_section
             in_job = in_services = in_steps = False
             continue
 
-        if stripped == 'jobs:':
-            result.append('jobs:')
-            section = 'jobs'
-            in_job = in_services = in_steps = False
-            continue
-
-        if stripped == 'env:' and section is None:
-            result.append('env:')
-            section = 'env'
-            continue
-
-        if stripped == 'permissions:' and section is None:
-            result.append('permissions:')
-            section = 'permissions'
+        if new_section and section is None:
+            result[i] = stripped
+            section = new_section
             continue
 
         # Inside 'on:' section
         if section == 'on':
-            if stripped in ['push:', 'pull_request:', 'workflow_dispatch:', 'schedule:', 'release:']:
-                result.append('  ' + stripped)
+            if stripped in _GHA_TRIGGER_LINES:
+                result[i] = '  ' + stripped
                 continue
-            if ':' in stripped or stripped.startswith('-'):
-                result.append('    ' + stripped)
+            if ':' in stripped or starts_dash:
+                result[i] = '    ' + stripped
                 continue
 
         # Inside 'env:' or 'permissions:' section (top-level)
-        if section in ['env', 'permissions']:
-            result.append('  ' + stripped)
+        if section in ('env', 'permissions'):
+            result[i] = '  ' + stripped
             continue
 
         # Inside 'jobs:' section
         if section == 'jobs':
             # First check if we're inside a job's sub-sections (before checking for new job)
             if in_job:
-                # Handle steps:
-                if stripped == 'steps:':
-                    result.append('    steps:')  # 4 spaces
-                    in_steps = True
-                    in_step_item = False
-                    in_services = in_service = in_with = in_strategy = in_matrix = False
-                    continue
-
-                # Handle services:
-                if stripped == 'services:':
-                    result.append('    services:')  # 4 spaces
-                    in_services = True
-                    in_steps = in_step_item = in_with = in_strategy = in_matrix = False
-                    continue
-
-                # Handle strategy:
-                if stripped == 'strategy:':
-                    result.append('    strategy:')  # 4 spaces
-                    in_strategy = True
-                    in_steps = in_services = in_with = in_matrix = False
+                # Handle steps:, services: and strategy: (4 spaces)
+                if stripped in _GHA_JOB_BLOCK_LINES:
+                    result[i] = '    ' + stripped
+                    if stripped == 'steps:':
+                        in_steps = True
+                        in_step_item = False
+                        in_services = in_service = in_with = in_strategy = in_matrix = False
+                    elif stripped == 'services:':
+                        in_services = True
+                        in_steps = in_step_item = in_with = in_strategy = in_matrix = False
+                    else:
+                        in_strategy = True
+                        in_steps = in_services = in_with = in_matrix = False
                     continue
 
                 # Inside strategy
                 if in_strategy:
                     if stripped == 'matrix:':
-                        result.append('      matrix:')  # 6 spaces
+                        result[i] = '      matrix:'  # 6 spaces
                         in_matrix = True
                         continue
                     if in_matrix:
-                        result.append('        ' + stripped)  # 8 spaces
+                        result[i] = '        ' + stripped  # 8 spaces
                         continue
-                    result.append('      ' + stripped)  # 6 spaces
+                    result[i] = '      ' + stripped  # 6 spaces
                     continue
 
                 # Inside services section (must check before job name detection!)
                 if in_services:
                     # Service name (postgres:, redis:, sqlite:, etc.)
-                    if stripped.endswith(':') and stripped.count(':') == 1 and key not in service_keys:
-                        result.append('      ' + stripped)  # 6 spaces - service name
+                    if is_name_line and key not in _GHA_SERVICE_KEYS:
+                        result[i] = '      ' + stripped  # 6 spaces - service name
                         in_service = True
                         in_service_env = False
                         continue
                     if in_service:
                         # Check if this is env: block
                         if stripped == 'env:':
-                            result.append('        env:')  # 8 spaces
+                            result[i] = '        env:'  # 8 spaces
                             in_service_env = True
                             continue
                         # Content inside env: block (env vars like POSTGRES_PASSWORD: value)
                         if in_service_env:
-                            if key in service_keys and key != 'env':
+                            if key in _GHA_SERVICE_KEYS_AFTER_ENV:
                                 # New service key, exit env block
                                 in_service_env = False
-                                result.append('        ' + stripped)  # 8 spaces
+                                result[i] = '        ' + stripped  # 8 spaces
                             else:
-                                result.append('          ' + stripped)  # 10 spaces (env var)
+                                result[i] = '          ' + stripped  # 10 spaces (env var)
                             continue
                         # Service config (image:, ports:, etc.)
-                        if key in service_keys:
-                            result.append('        ' + stripped)  # 8 spaces
+                        if key in _GHA_SERVICE_KEYS:
+                            result[i] = '        ' + stripped  # 8 spaces
                             continue
-                        if stripped.startswith('-'):
-                            result.append('          ' + stripped)  # 10 spaces (list items)
+                        if starts_dash:
+                            result[i] = '          ' + stripped  # 10 spaces (list items)
                             continue
-                        result.append('        ' + stripped)  # 8 spaces
+                        result[i] = '        ' + stripped  # 8 spaces
                         continue
-                    result.append('      ' + stripped)  # 6 spaces
+                    result[i] = '      ' + stripped  # 6 spaces
                     continue
 
                 # Inside steps
@@ -874,22 +965,21 @@ def fix_github_actions_yaml(content: str) -> str:
                     # Check if this looks like a new job name (escape hatch)
                     # A new job name: ends with :, single colon, not a step key
                     looks_like_job = (
-                        stripped.endswith(':') and
-                        stripped.count(':') == 1 and
-                        key and key not in job_keys and key not in service_keys and
-                        key not in step_item_keys and
-                        not stripped.startswith('-')
+                        is_name_line and
+                        key and key not in _GHA_JOB_KEYS and key not in _GHA_SERVICE_KEYS and
+                        key not in _GHA_STEP_ITEM_KEYS and
+                        not starts_dash
                     )
                     if looks_like_job:
                         # This is a new job, escape from steps
-                        result.append('  ' + stripped)  # 2 spaces - job name
+                        result[i] = '  ' + stripped  # 2 spaces - job name
                         in_job = True
                         in_services = in_service = in_steps = in_step_item = in_with = in_strategy = in_matrix = False
                         continue
 
                     # Step list item (- uses:, - name:, etc.)
-                    if stripped.startswith('-'):
-                        result.append('      ' + stripped)  # 6 spaces
+                    if starts_dash:
+                        result[i] = '      ' + stripped  # 6 spaces
                         in_step_item = True
                         in_with = False
                         continue
@@ -897,190 +987,429 @@ def fix_github_actions_yaml(content: str) -> str:
                     if in_step_item:
                         # with: under step item
                         if stripped == 'with:':
-                            result.append('        with:')  # 8 spaces
+                            result[i] = '        with:'  # 8 spaces
                             in_with = True
                             continue
 
                         # Content under with:
                         if in_with:
-                            result.append('          ' + stripped)  # 10 spaces
+                            result[i] = '          ' + stripped  # 10 spaces
                             # Exit with: when we see another step key
-                            if key in step_item_keys and key != 'with':
+                            if key in _GHA_STEP_ITEM_KEYS_AFTER_WITH:
                                 in_with = False
                             continue
 
                         # Other step item content (run:, uses:, env:, etc.)
-                        result.append('        ' + stripped)  # 8 spaces
+                        result[i] = '        ' + stripped  # 8 spaces
                         # Exit with: mode when we see step keys
-                        if key in step_item_keys:
+                        if key in _GHA_STEP_ITEM_KEYS:
                             in_with = False
                         continue
 
                 # Job-level keys (runs-on:, needs:, etc.)
-                if key in job_keys:
-                    result.append('    ' + stripped)  # 4 spaces
+                if key in _GHA_JOB_KEYS:
+                    result[i] = '    ' + stripped  # 4 spaces
                     continue
 
             # Detect job name: single word ending with : that's not a job_key
             is_job_name = (
-                stripped.endswith(':') and
-                stripped.count(':') == 1 and
-                key and key not in job_keys and key not in service_keys
+                is_name_line and
+                key and key not in _GHA_JOB_KEYS and key not in _GHA_SERVICE_KEYS
             )
 
             if is_job_name:
-                result.append('  ' + stripped)  # 2 spaces - job name
+                result[i] = '  ' + stripped  # 2 spaces - job name
                 in_job = True
                 in_services = in_service = in_steps = in_step_item = in_with = in_strategy = in_matrix = False
                 continue
 
             # Fallback for job content - unknown keys get job-level indent
             if in_job:
-                result.append('    ' + stripped)  # 4 spaces
+                result[i] = '    ' + stripped  # 4 spaces
                 continue
 
         # Fallback
-        result.append(stripped)
+        result[i] = stripped
 
     return '\n'.join(result)
 
 
-def format_yaml_file(filepath: Path) -> bool:
+def clear_caches() -> None:
+    """Drop memoized fix_* results, formatted-file records and formatter paths.
+
+    Call after installing or removing black/prettier to pick up the change.
+    """
+    for fix in (
+        fix_python_indentation, fix_js_indentation, fix_pydantic_config,
+        fix_settings_instantiation, fix_yaml_indentation,
+        fix_docker_compose_yaml, fix_github_actions_yaml,
+    ):
+        fix.cache_clear()
+    _formatted_signatures.clear()
+    _which.cache_clear()
+    _black_module.cache_clear()
+    _black_mode.cache_clear()
+
+
+@functools.lru_cache(maxsize=8)
+def _which(name: str) -> str | None:
+    """Resolve an external formatter on PATH once per process."""
+    return shutil.which(name)
+
+
+@functools.lru_cache(maxsize=1)
+def _black_module():
+    """The black package if it is importable in this process, else None."""
+    try:
+        import black
+    except ImportError:
+        return None
+    return black
+
+
+def _black_command() -> List[str] | None:
+    """Command that runs black as a subprocess, or None if black is unavailable.
+
+    Prefers the black executable on PATH; otherwise runs the importable
+    package with this interpreter (e.g. a venv that was not activated).
+    """
+    black_path = _which("black")
+    if black_path:
+        return [black_path]
+    if _black_module() is not None:
+        return [sys.executable, "-m", "black"]
+    return None
+
+
+def _run_external_formatter(command: List[str], paths: List[Path]) -> None:
+    """Run black/prettier over paths in one process.
+
+    External formatting is optional: timeouts and failures are ignored.
+    """
+    try:
+        subprocess.run(
+            [*command, *map(str, paths)],
+            stdout=subprocess.DEVNULL,  # Output is not used; don't buffer it
+            stderr=subprocess.DEVNULL,
+            timeout=10 * len(paths)  # Formatting should be fast: 10s per file
+        )
+    except subprocess.TimeoutExpired:
+        pass  # Skip if timeout
+    except Exception:
+        pass
+
+
+def _pipe_external_formatter(command: List[str], content: str) -> str:
+    """Format content with black/prettier over stdin/stdout.
+
+    External formatting is optional: on timeout or failure the content is
+    returned unchanged.
+    """
+    try:
+        completed = subprocess.run(
+            command,
+            input=content,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf-8',
+            timeout=10  # Reduced timeout - formatting should be fast
+        )
+    except subprocess.TimeoutExpired:
+        return content  # Skip if timeout
+    except Exception:
+        return content
+    return completed.stdout if completed.returncode == 0 else content
+
+
+@functools.lru_cache(maxsize=64)
+def _black_mode(directory: str, is_pyi: bool):
+    """black.Mode for files in directory, from the project's [tool.black].
+
+    Uses the same pyproject.toml lookup as the black CLI, so in-process and
+    batched formatting agree; cached per directory and stub flag.
+    """
+    black = _black_module()
+    config: dict = {}
+    try:
+        pyproject = black.find_pyproject_toml((directory,))
+        if pyproject:
+            config = black.parse_pyproject_toml(pyproject)
+    except Exception:
+        config = {}  # Unreadable config: black's defaults, like a bare run
+    try:
+        target_versions = {
+            black.TargetVersion[version.upper()]
+            for version in config.get("target_version") or ()
+        }
+    except KeyError:
+        target_versions = set()
+    return black.Mode(
+        target_versions=target_versions,
+        line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+        preview=bool(config.get("preview", False)),
+        is_pyi=is_pyi or bool(config.get("pyi", False)),
+    )
+
+
+def _format_with_black(content: str, filepath: Path) -> str:
+    """Format Python source with black, in-process when black is importable.
+
+    The mode follows the project's [tool.black] settings and .pyi stubs, as
+    the batched CLI run in format_project does. Falls back to piping through
+    the black executable. Invalid code, or no black at all, leaves the
+    content unchanged.
+    """
+    black = _black_module()
+    if black is not None:
+        try:
+            mode = _black_mode(str(filepath.parent), filepath.suffix == ".pyi")
+            return black.format_str(content, mode=mode)
+        except Exception:
+            return content
+
+    black_path = _which("black")
+    if black_path:
+        return _pipe_external_formatter(
+            [black_path, "--quiet", "--stdin-filename", str(filepath), "-"], content
+        )
+    return content
+
+
+def _read_formattable(filepath: Path) -> str | None:
+    """Read a file to format, or None if it is empty, too large or binary."""
+    if not 0 < filepath.stat().st_size <= MAX_FORMAT_BYTES:
+        return None
+    content = filepath.read_text(encoding='utf-8')
+    if '\0' in content[:8192]:
+        return None
+    return content
+
+
+def _atomic_write_text(path: Path, content: str) -> None:
+    """Replace a file's content via a sibling temp file and os.replace.
+
+    Readers never see a half-written file, and the original file mode is kept.
+    """
+    tmp = tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=path.parent, prefix=f'.{path.name}.', delete=False
+    )
+    try:
+        # Write failures (disk full, unencodable text) also remove the temp file
+        with tmp:
+            tmp.write(content)
+        shutil.copymode(path, tmp.name)
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def format_yaml_file(filepath: Path, path_lower: str | None = None) -> bool:
     """Format a YAML file with proper indentation.
 
+    path_lower is str(filepath).lower(), if the caller already has it.
+
     Returns True if formatting was successful, False otherwise.
     """
     try:
-        content = filepath.read_text(encoding='utf-8')
+        content = _read_formattable(filepath)
+        if content is None:
+            return True
         filename = filepath.name.lower()
+        if path_lower is None:
+            path_lower = str(filepath).lower()
 
         if 'docker-compose' in filename or 'compose' in filename:
             fixed_content = fix_docker_compose_yaml(content)
-        elif 'ci' in filename or 'workflow' in filename or '.github' in str(filepath).lower():
+        elif 'ci' in filename or 'workflow' in filename or '.github' in path_lower:
             fixed_content = fix_github_actions_yaml(content)
         else:
             # Generic YAML fix
             fixed_content = fix_yaml_indentation(content)
 
-        filepath.write_text(fixed_content, encoding='utf-8')
+        if fixed_content != content:
+            _atomic_write_text(filepath, fixed_content)
         return True
     except Exception:
         return False
 
 
-def format_python_file(filepath: Path) -> bool:
+def format_python_file(
+    filepath: Path, run_black: bool = True, path_lower: str | None = None
+) -> bool:
     """Format a Python file - first fix indentation, then run black.
 
+    With run_black=False only the indentation fixes are applied (format_project
+    runs black once over all files afterwards). path_lower is
+    str(filepath).lower(), if the caller already has it.
+
     Returns True if formatting was successful, False otherwise.
     """
     try:
         # Read the file
-        content = filepath.read_text(encoding='utf-8')
+        content = _read_formattable(filepath)
+        if content is None:
+            return True
 
         # First, fix indentation
         fixed_content = fix_python_indentation(content)
 
         # Apply Pydantic/Settings fixes for schema and config files
-        filepath_str = str(filepath).lower()
-        if 'schema' in filepath_str:
+        if path_lower is None:
+            path_lower = str(filepath).lower()
+        if 'schema' in path_lower:
             fixed_content = fix_pydantic_config(fixed_content)
-        if 'config' in filepath_str or 'settings' in filepath_str:
+        if 'config' in path_lower or 'settings' in path_lower:
             fixed_content = fix_settings_instantiation(fixed_content)
 
+        # Then try to run black for additional formatting, on the fixed
+        # content so the file is written only once
+        if run_black:
+            fixed_content = _format_with_black(fixed_content, filepath)
+
         # Write back the fixed content
-        filepath.write_text(fixed_content, encoding='utf-8')
-
-        # Then try to run black for additional formatting
-        black_path = shutil.which("black")
-        if black_path:
-            try:
-                subprocess.run(
-                    [black_path, str(filepath), "--quiet"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10  # Reduced timeout - formatting should be fast
-                )
-            except subprocess.TimeoutExpired:
-                pass  # Skip if timeout
-            except Exception:
-                pass  # Black formatting is optional
+        if fixed_content != content:
+            _atomic_write_text(filepath, fixed_content)
 
         return True
     except Exception:
         return False
 
 
-def format_js_file(filepath: Path) -> bool:
+def format_js_file(filepath: Path, run_prettier: bool = True) -> bool:
     """Format a JavaScript/TypeScript/JSON file.
 
-    First fixes indentation using our custom indenter, then runs prettier if available.
+    First fixes indentation using our custom indenter, then runs prettier if available
+    (skipped with run_prettier=False, for callers that batch prettier themselves).
 
     Returns True if formatting was successful, False otherwise.
     """
     try:
         # Read the file
-        content = filepath.read_text(encoding='utf-8')
+        content = _read_formattable(filepath)
+        if content is None:
+            return True
 
         # First, fix indentation (skip for JSON files as they have different structure)
         suffix = filepath.suffix.lower()
-        if suffix != '.json':
-            fixed_content = fix_js_indentation(content)
-            filepath.write_text(fixed_content, encoding='utf-8')
+        fixed_content = content if suffix == '.json' else fix_js_indentation(content)
 
-        # Then try to run prettier for additional formatting
+        # Then try to run prettier for additional formatting, piping the fixed
+        # content through it so the file is written at most once
         # Only use direct prettier, NOT npx (npx can hang trying to download)
-        prettier_path = shutil.which("prettier")
+        prettier_path = _which("prettier") if run_prettier else None
 
         if prettier_path:
-            try:
-                subprocess.run(
-                    [prettier_path, "--write", str(filepath)],
-                    capture_output=True,
-                    text=True,
-                    timeout=10  # Reduced timeout - formatting should be fast
-                )
-            except subprocess.TimeoutExpired:
-                pass  # Skip if timeout
-            except Exception:
-                pass  # Prettier formatting is optional
+            fixed_content = _pipe_external_formatter(
+                [prettier_path, "--stdin-filepath", str(filepath)], fixed_content
+            )
+
+        if fixed_content != content:
+            _atomic_write_text(filepath, fixed_content)
 
         return True
     except Exception:
         return False
 
 
-def format_file(filepath: Path, on_formatted: Callable[[str, bool], None] | None = None) -> bool:
+# (mtime_ns, size) of each file right after this process last fully formatted
+# it (fixes plus black/prettier); an unchanged file is not formatted again
+_formatted_signatures: dict[str, bytes] = {}
+
+
+def _file_signature(filepath: Path) -> bytes | None:
+    """Content hash of a file, or None if it is unreadable or too large to format.
+
+    Hashing the bytes (not mtime/size) also catches same-size rewrites
+    within the filesystem's mtime resolution; blake2b is cheap next to
+    formatting the file.
+    """
+    try:
+        if filepath.stat().st_size > MAX_FORMAT_BYTES:
+            return None
+        return hashlib.blake2b(filepath.read_bytes(), digest_size=16).digest()
+    except OSError:
+        return None
+
+
+def _is_formatted(filepath: Path) -> bool:
+    """True if the file is unchanged since it was last fully formatted."""
+    signature = _file_signature(filepath)
+    return signature is not None and _formatted_signatures.get(str(filepath)) == signature
+
+
+def _mark_formatted(filepath: Path) -> None:
+    signature = _file_signature(filepath)
+    if signature is not None:
+        _formatted_signatures[str(filepath)] = signature
+
+
+def format_file(
+    filepath: Path,
+    on_formatted: Callable[[str, bool], None] | None = None,
+    run_external: bool = True,
+) -> bool:
     """Auto-format a file based on its extension.
 
     Args:
         filepath: Path to the file to format
         on_formatted: Optional callback(filepath, success) called after formatting
+        run_external: If False, skip black/prettier and only apply our own fixes
 
     Returns:
         True if formatting was successful or not needed, False if it failed
     """
+    path_str = str(filepath)
+
+    # Already formatted and untouched since: nothing to do
+    if _is_formatted(filepath):
+        if on_formatted:
+            on_formatted(path_str, True)
+        return True
+
     suffix = filepath.suffix.lower()
-    filename = filepath.name.lower()
     success = True
 
     # Python files
     if suffix == ".py":
-        success = format_python_file(filepath)
+        success = format_python_file(filepath, run_black=run_external, path_lower=path_str.lower())
 
     # YAML files (docker-compose.yml, ci.yml, etc.)
     elif suffix in (".yml", ".yaml"):
-        success = format_yaml_file(filepath)
+        success = format_yaml_file(filepath, path_lower=path_str.lower())
 
     # JavaScript/TypeScript files
     elif suffix in (".js", ".jsx", ".ts", ".tsx", ".json", ".css", ".scss", ".html", ".vue", ".svelte"):
-        success = format_js_file(filepath)
+        success = format_js_file(filepath, run_prettier=run_external)
+
+    if success and run_external:
+        _mark_formatted(filepath)
 
     if on_formatted:
-        on_formatted(str(filepath), success)
+        on_formatted(path_str, success)
 
     return success
 
 
+def _iter_project_files(root: Path) -> Iterator[os.DirEntry]:
+    """Yield a DirEntry for every file under root, pruning _EXCLUDE_DIRS."""
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _EXCLUDE_DIRS:
+                        stack.append(Path(entry.path))
+                elif entry.is_file():
+                    yield entry
+
+
 def format_project(project_dir: Path, on_progress: Callable[[str, bool], None] | None = None) -> dict:
     """Format all files in a project directory.
 
@@ -1099,26 +1428,69 @@ def format_project(project_dir: Path, on_progress: Callable[[str, bool], None] |
     yaml_exts = {".yml", ".yaml"}
     all_exts = python_exts | js_exts | yaml_exts
 
-    for filepath in project_dir.rglob("*"):
-        if not filepath.is_file():
-            continue
-
-        suffix = filepath.suffix.lower()
+    files = []
+    # node_modules, virtual environments etc. are pruned, not walked and
+    # filtered; Path objects are only built for files with a formattable suffix
+    for entry in _iter_project_files(project_dir):
+        suffix = os.path.splitext(entry.name)[1].lower()
         if suffix not in all_exts:
             stats["skipped"] += 1
             continue
 
-        # Skip node_modules and virtual environments
-        path_str = str(filepath)
-        if "node_modules" in path_str or "venv" in path_str or ".venv" in path_str:
-            stats["skipped"] += 1
-            continue
+        filepath = Path(entry.path)
 
-        success = format_file(filepath, on_progress)
-        if success:
+        # Unchanged since the last full format in this process
+        if _is_formatted(filepath):
             stats["formatted"] += 1
-        else:
-            stats["failed"] += 1
+            if on_progress:
+                on_progress(str(filepath), True)
+            continue
+
+        files.append(filepath)
+
+    if not files:
+        return stats
+
+    # Fix indentation concurrently; progress is reported from this thread
+    formatted_files = []
+    python_files = []
+    js_files = []
+    with ThreadPoolExecutor(max_workers=min(FORMAT_WORKERS, len(files))) as pool:
+        futures = {
+            pool.submit(format_file, filepath, run_external=False): filepath
+            for filepath in files
+        }
+        for future in as_completed(futures):
+            filepath = futures[future]
+            success = future.result()
+            if on_progress:
+                on_progress(str(filepath), success)
+            if success:
+                stats["formatted"] += 1
+                formatted_files.append(filepath)
+                suffix = filepath.suffix.lower()
+                if suffix in python_exts:
+                    python_files.append(filepath)
+                elif suffix in js_exts:
+                    js_files.append(filepath)
+            else:
+                stats["failed"] += 1
+
+        # Then run black/prettier once per batch of files instead of once per file
+        batches = []
+        black_command = _black_command()
+        if black_command:
+            batches += [([*black_command, "--quiet"], python_files[i:i + EXTERNAL_BATCH_SIZE])
+                        for i in range(0, len(python_files), EXTERNAL_BATCH_SIZE)]
+        prettier_path = _which("prettier")
+        if prettier_path:
+            batches += [([prettier_path, "--write"], js_files[i:i + EXTERNAL_BATCH_SIZE])
+                        for i in range(0, len(js_files), EXTERNAL_BATCH_SIZE)]
+        for batch in [pool.submit(_run_external_formatter, *batch) for batch in batches]:
+            batch.result()
+
+    for filepath in formatted_files:
+        _mark_formatted(filepath)
 
     return stats
 
@@ -1130,9 +1502,10 @@ def check_formatters_available() -> dict:
         Dictionary with formatter names and their availability
     """
     return {
-        "black": shutil.which("black") is not None,
+        # Same resolution format_project batches with
+        "black": _black_command() is not None,
         # Only check direct prettier, NOT npx (npx can hang trying to download)
-        "prettier": shutil.which("prettier") is not None,
+        "prettier": _which("prettier") is not None,
         "python_indenter": True,  # Our custom Python indenter is always available
         "js_indenter": True,  # Our custom JS/TS indenter is always available
         "yaml_indenter": True,  # Our custom YAML indenter is always available
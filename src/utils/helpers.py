@@ -1,9 +1,11 @@
 """Helper utility functions."""
+import ast
+import functools
 import locale
 import re
 import threading
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable
 
 PREFERRED_ENCODING = locale.getpreferredencoding(False) or "utf-8"
 
@@ -26,6 +28,24 @@ LLM_COMMENTARY_PATTERNS = [
     r"^(?:\d+\.\s+)?(?:Create|Creating|Generate|Generating|Implement|Implementing)",
     r"^(?:\d+\.\s+)?(?:Buat|Membuat|Hasilkan|Menghasilkan|Implementasi)",
 ]
+# All patterns fused into one alternation; .match() anchors every branch.
+# Lowercased and matched against the lowercased line, which is cheaper than
+# re.IGNORECASE case folding
+_LLM_COMMENTARY_RE = re.compile(
+    "|".join(f"(?:{p.removeprefix('^').lower()})" for p in LLM_COMMENTARY_PATTERNS)
+)
+# Characters any commentary pattern can start with (keep in sync with the
+# patterns above); other lines skip the lowercasing and the regex
+_COMMENTARY_FIRST_CHARS = frozenset("abcdfghilmnpstwABCDFGHILMNPSTW0123456789")
+
+# Substrings that mark a line as code rather than commentary
+_CODE_INDICATORS = (
+    '(', ')', '{', '}', '[', ']', '=', ';', ':', 'def ', 'class ',
+    'import ', 'from ', 'return ', 'if ', 'for ', 'while ', 'const ',
+    'let ', 'var ', 'function ', '=>', '->', '...', '===', '`',
+)
+# One scan over the line instead of a substring search per indicator
+_CODE_INDICATOR_RE = re.compile("|".join(map(re.escape, _CODE_INDICATORS)))
 
 
 def is_llm_commentary(line: str) -> bool:
@@ -45,22 +65,20 @@ def is_llm_commentary(line: str) -> bool:
         return False
 
     # Lines that look like code (have programming syntax) are not commentary
-    code_indicators = ['(', ')', '{', '}', '[', ']', '=', ';', ':', 'def ', 'class ',
-                       'import ', 'from ', 'return ', 'if ', 'for ', 'while ', 'const ',
-                       'let ', 'var ', 'function ', '=>', '->', '...', '===', '`']
-    if any(indicator in stripped for indicator in code_indicators):
+    if _CODE_INDICATOR_RE.search(stripped):
         return False
 
     # Check against commentary patterns
-    for pattern in LLM_COMMENTARY_PATTERNS:
-        if re.match(pattern, stripped, re.IGNORECASE):
-            return True
-
-    return False
+    if stripped[0] not in _COMMENTARY_FIRST_CHARS:
+        return False
+    return _LLM_COMMENTARY_RE.match(stripped.lower()) is not None
 
 
 def sanitize_for_output(text: str) -> str:
     """Sanitize text for safe output encoding."""
+    # ASCII is encodable in any preferred encoding; isascii() is O(1) for str
+    if text.isascii():
+        return text
     try:
         text.encode(PREFERRED_ENCODING)
         return text
@@ -73,13 +91,129 @@ def format_exception(exc: Exception) -> str:
     return sanitize_for_output(str(exc))
 
 
+_SLUG_SEPARATOR_RE = re.compile(r"[^a-z0-9]+")
+
+
 def slugify(text: str) -> str:
     """Convert text to URL-safe slug."""
-    candidate = re.sub(r"[^a-z0-9]+", "-", text.lower())
+    candidate = _SLUG_SEPARATOR_RE.sub("-", text.lower())
     candidate = candidate.strip("-")
     return candidate or "project"
 
 
+# Signature lines worth keeping from JS/TS sources in a code skeleton
+JS_SIGNATURE_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'(?:export\s+)?(?:default\s+)?(?:async\s+)?function\b[^{]*'
+    r'|(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\b[^{]*'
+    r'|(?:export\s+)?(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::[^=]+)?=>'
+    r'|(?:export\s+)?(?:interface|type|enum)\s+\w+[^{=]*'
+    r'|(?:router|app|api)\.(?:get|post|put|patch|delete|use)\s*\([^,)]*'
+    r')'
+)
+
+
+def _python_skeleton(source: str) -> str | None:
+    """Signatures, decorators, class fields and docstring summaries of Python source."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines: list[str] = []
+
+    def visit(nodes, indent: str) -> None:
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                for decorator in node.decorator_list:
+                    lines.append(f"{indent}@{ast.unparse(decorator)}")
+                if isinstance(node, ast.ClassDef):
+                    bases = ", ".join(ast.unparse(b) for b in node.bases + node.keywords)
+                    lines.append(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:")
+                else:
+                    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+                    lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}: ...")
+                docstring = ast.get_docstring(node)
+                if docstring:
+                    lines.append(f'{indent}    """{docstring.splitlines()[0]}"""')
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body, indent + "    ")
+            elif isinstance(node, ast.AnnAssign) and indent:
+                # Class fields (Pydantic/SQLAlchemy models) define the API contract
+                lines.append(f"{indent}{ast.unparse(node)}")
+
+    visit(tree.body, "")
+    return "\n".join(lines)
+
+
+def _js_skeleton(source: str) -> str:
+    """Function, class, type and route declarations of JS/TS source."""
+    lines = []
+    for line in source.split("\n"):
+        match = JS_SIGNATURE_PATTERN.match(line)
+        if match:
+            lines.append(match.group(0).rstrip())
+    return "\n".join(lines)
+
+
+def _split_file_blocks(content: str) -> list[tuple[str, str]]:
+    """Split ===FILE: path=== ... ===END_FILE=== output into (path, body) pairs."""
+    blocks = []
+    path = None
+    body: list[str] = []
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith(FILE_START_MARKER) and stripped.endswith("==="):
+            if path is not None:
+                blocks.append((path, "\n".join(body)))
+            path = stripped[len(FILE_START_MARKER):-3].strip()
+            body = []
+        elif stripped == FILE_END_MARKER:
+            if path is not None:
+                blocks.append((path, "\n".join(body)))
+            path = None
+            body = []
+        elif path is not None:
+            body.append(line)
+    if path is not None:
+        blocks.append((path, "\n".join(body)))
+    return blocks
+
+
+@functools.lru_cache(maxsize=32)
+def code_skeleton(content: str, limit: int) -> str:
+    """Compress generated code to an outline of its declarations.
+
+    Each file block is reduced to its signatures (Python via ``ast``,
+    JS/TS via signature regexes); other files are listed by path only.
+    This fits far more of the API surface into a prompt excerpt than
+    truncating raw source. Falls back to ``content[:limit]`` when no
+    declarations can be extracted.
+    """
+    blocks = _split_file_blocks(content) or [("", content)]
+    parts = []
+    extracted = False
+    for path, body in blocks:
+        if path.endswith(".py") or not path:
+            skeleton = _python_skeleton(body)
+            if skeleton is None and not path:
+                skeleton = _js_skeleton(body)
+        elif path.endswith((".js", ".jsx", ".ts", ".tsx", ".mjs", ".vue", ".svelte")):
+            skeleton = _js_skeleton(body)
+        else:
+            skeleton = ""
+        extracted = extracted or bool(skeleton)
+        if path:
+            parts.append(f"# {path}\n{skeleton}" if skeleton else f"# {path}")
+        elif skeleton:
+            parts.append(skeleton)
+
+    if not extracted:
+        return content[:limit]
+    return "\n\n".join(parts)[:limit]
+
+
 class AgentFileState:
     """Per-agent state for parallel execution safety.
 
@@ -93,6 +227,35 @@ class AgentFileState:
         self.in_code_block: bool = False
         self.in_raw_mode: bool = False
         self.pending_file: str | None = None
+        # Guards this agent's state only, so agents don't contend while one
+        # of them writes a file
+        self.lock = threading.Lock()
+
+
+# Python built-in modules that should NOT be in requirements.txt
+_BUILTIN_MODULES = frozenset({
+    'sqlite3', 'os', 'sys', 'json', 're', 'math', 'datetime', 'time',
+    'random', 'collections', 'itertools', 'functools', 'operator',
+    'string', 'io', 'pathlib', 'typing', 'abc', 'enum', 'dataclasses',
+    'copy', 'pickle', 'shelve', 'dbm', 'csv', 'configparser', 'argparse',
+    'logging', 'warnings', 'traceback', 'unittest', 'doctest', 'pdb',
+    'threading', 'multiprocessing', 'subprocess', 'socket', 'ssl',
+    'email', 'html', 'xml', 'urllib', 'http', 'ftplib', 'smtplib',
+    'uuid', 'hashlib', 'hmac', 'secrets', 'base64', 'binascii',
+    'struct', 'codecs', 'locale', 'gettext', 'unicodedata',
+    'tempfile', 'shutil', 'glob', 'fnmatch', 'linecache', 'stat',
+    'fileinput', 'contextlib', 'weakref', 'types', 'gc', 'inspect',
+    'dis', 'ast', 'ctypes', 'concurrent', 'asyncio', 'queue', 'heapq',
+})
+
+# Patterns used per streamed line by StreamingFileSaver
+_AGENT_PREFIX_RE = re.compile(r'^\[[^\]]+\]\s*')  # "[Backend Engineer] "
+_BOLD_RE = re.compile(r'\*\*([^*]+)\*\*')
+_NUMBERING_RE = re.compile(r'^[\d]+[.)]\s*')  # "1. " or "1) "
+_PATH_LABELS = ('file:', 'path:')  # "File: path" labels, compared lowercased
+_LIST_ITEM_RE = re.compile(r'^(?:[\d]+[.)]\s*|-\s*|\*\s*)(.+)$')
+_TRAILING_DESCRIPTION_RE = re.compile(r'\s*[-–—]\s+')  # " - description"
+_PACKAGE_NAME_END_RE = re.compile(r'[=<>\[\s]')  # end of a requirements.txt name
 
 
 class StreamingFileSaver:
@@ -148,9 +311,11 @@ class StreamingFileSaver:
     ):
         self.output_dir = output_dir
         self.on_file_saved = on_file_saved
+        # Shared by all agents; list.append is atomic, so no lock is needed
         self.buffer: list[str] = []
         self.saved_files: list[str] = []
-        self._lock = threading.Lock()  # Thread-safe access for parallel agents
+        # Guards _agent_states; each agent's state has its own lock
+        self._lock = threading.Lock()
 
         # Per-agent state for parallel execution
         # Key: agent_name (or "_default" for no agent specified)
@@ -163,13 +328,22 @@ class StreamingFileSaver:
         during parallel execution.
         """
         key = agent_name or "_default"
-        if key not in self._agent_states:
-            self._agent_states[key] = AgentFileState()
-        return self._agent_states[key]
-
-    def _extract_filepath(self, line: str) -> str | None:
-        """Try to extract a file path from various formats."""
-        stripped = line.strip()
+        state = self._agent_states.get(key)
+        if state is None:
+            with self._lock:
+                state = self._agent_states.setdefault(key, AgentFileState())
+        return state
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _extract_filepath(stripped: str) -> str | None:
+        """Try to extract a file path from various formats.
+
+        Takes the already stripped line. Memoized per line: headers and
+        fences repeat across retries and across agents that output the
+        same plan.
+        """
+        path_pattern = StreamingFileSaver.FILE_PATH_PATTERN
 
         # Format 1: ===FILE: path/to/file.py===
         if stripped.startswith(FILE_START_MARKER) and stripped.endswith("==="):
@@ -185,63 +359,50 @@ class StreamingFileSaver:
                 # Check if first part is a language, second is path
                 if len(parts) == 2:
                     potential_path = parts[1].lstrip('#').strip()
-                    if self.FILE_PATH_PATTERN.match(potential_path):
+                    if path_pattern.match(potential_path):
                         return potential_path
                 # Or path might be the whole thing after language
                 potential_path = parts[0].lstrip('#').strip()
-                if self.FILE_PATH_PATTERN.match(potential_path):
+                if path_pattern.match(potential_path):
                     return potential_path
             return None
 
         # Format 3: **File: path** or **path** or **1. path**
         if "**" in stripped:
             # Extract content between ** markers
-            match = re.search(r'\*\*([^*]+)\*\*', stripped)
+            match = _BOLD_RE.search(stripped)
             if match:
                 inner = match.group(1).strip()
                 # Remove numbering like "1. " or "1) "
-                inner = re.sub(r'^[\d]+[.)]\s*', '', inner)
-                # Remove common prefixes
-                for prefix in ["File:", "file:", "Path:", "path:"]:
-                    if inner.lower().startswith(prefix.lower()):
-                        inner = inner[len(prefix):].strip()
-                        break
-                if self.FILE_PATH_PATTERN.match(inner):
+                inner = _NUMBERING_RE.sub('', inner)
+                # Remove common prefixes (File:, path:, ...)
+                if inner[:5].lower() in _PATH_LABELS:
+                    inner = inner[5:].strip()
+                if path_pattern.match(inner):
                     return inner
 
         # Format 4: # path/to/file.py or ## path/to/file.py (markdown headers)
         if stripped.startswith("#"):
             inner = stripped.lstrip("#").strip()
             # Remove numbering like "1. " or "1) "
-            inner = re.sub(r'^[\d]+[.)]\s*', '', inner)
-            # Remove common prefixes
-            for prefix in ["File:", "file:", "Path:", "path:"]:
-                if inner.lower().startswith(prefix.lower()):
-                    inner = inner[len(prefix):].strip()
-                    break
-            if self.FILE_PATH_PATTERN.match(inner):
+            inner = _NUMBERING_RE.sub('', inner)
+            # Remove common prefixes (File:, path:, ...)
+            if inner[:5].lower() in _PATH_LABELS:
+                inner = inner[5:].strip()
+            if path_pattern.match(inner):
                 return inner
 
         # Format 5: Numbered list with file path: "1. backend/app/main.py" or "- backend/app/main.py"
-        list_match = re.match(r'^(?:[\d]+[.)]\s*|-\s*|\*\s*)(.+)$', stripped)
+        list_match = _LIST_ITEM_RE.match(stripped)
         if list_match:
             potential = list_match.group(1).strip()
             # Remove trailing descriptions like " - description"
-            potential = re.split(r'\s*[-–—]\s+', potential)[0].strip()
-            if self.FILE_PATH_PATTERN.match(potential):
+            potential = _TRAILING_DESCRIPTION_RE.split(potential, maxsplit=1)[0].strip()
+            if path_pattern.match(potential):
                 return potential
 
         return None
 
-    def _is_code_block_end(self, line: str) -> bool:
-        """Check if line ends a code block."""
-        return line.strip() == "```"
-
-    def _is_file_end_marker(self, line: str) -> bool:
-        """Check if line is a file end marker."""
-        stripped = line.strip()
-        return stripped == FILE_END_MARKER
-
     def process_line(self, line: str, agent_name: str | None = None) -> None:
         """Process a single line of streaming output.
 
@@ -250,106 +411,104 @@ class StreamingFileSaver:
             agent_name: Optional agent name. Each agent maintains its own
                         file-building state for parallel execution safety.
         """
-        with self._lock:
-            # Get or create state for this agent
-            state = self._get_agent_state(agent_name)
-
-            # Strip agent prefix like "[Backend Engineer] "
-            cleaned_line = re.sub(r'^\[[^\]]+\]\s*', '', line)
-            stripped = cleaned_line.strip()
-
-            # Filter out LLM commentary when NOT inside a file block
-            # This prevents "I'll create...", "Saya akan..." etc. from polluting output
-            if not state.in_raw_mode and not (state.in_code_block and state.current_file):
-                if is_llm_commentary(cleaned_line):
-                    # Skip this line - it's LLM commentary, not code
-                    return
-
-            # Check for explicit end marker (===END_FILE===)
-            if self._is_file_end_marker(cleaned_line) and state.current_file:
-                self._save_file_from_state(state)
-                state.in_raw_mode = False
-                return
+        state = self._get_agent_state(agent_name)
+        with state.lock:
+            self._process_line_locked(line, state)
 
-            # Check for ===FILE: marker (explicit file format, no code block needed)
-            if stripped.startswith(FILE_START_MARKER) and stripped.endswith("==="):
-                filepath = stripped[len(FILE_START_MARKER):-3].strip()
-                if filepath:
-                    # Save previous file if exists
-                    if state.current_file and state.file_content:
-                        self._save_file_from_state(state)
-                    state.current_file = filepath
-                    state.file_content = []
-                    state.in_code_block = False
-                    state.in_raw_mode = True  # Using raw ===FILE:=== format
-                return
+    def process_lines(self, lines: Iterable[str], agent_name: str | None = None) -> None:
+        """Process several lines of one agent's output in order.
 
-            # If in raw mode (===FILE:=== format), accumulate everything until ===END_FILE===
-            if state.in_raw_mode and state.current_file:
-                state.file_content.append(cleaned_line)
+        Same as calling process_line for each line, but the agent's lock and
+        state lookup are taken once for the whole batch.
+        """
+        state = self._get_agent_state(agent_name)
+        with state.lock:
+            for line in lines:
+                self._process_line_locked(line, state)
+
+    def _process_line_locked(self, line: str, state: AgentFileState) -> None:
+        """Process one line for an agent's state; the caller holds state.lock."""
+        # Strip agent prefix like "[Backend Engineer] "; most lines have none,
+        # so the regex only runs on lines starting with a bracket
+        cleaned_line = _AGENT_PREFIX_RE.sub('', line, count=1) if line.startswith('[') else line
+        stripped = cleaned_line.strip()
+
+        # Filter out LLM commentary when NOT inside a file block
+        # This prevents "I'll create...", "Saya akan..." etc. from polluting output
+        if not state.in_raw_mode and not (state.in_code_block and state.current_file):
+            if is_llm_commentary(stripped):
+                # Skip this line - it's LLM commentary, not code
                 return
 
-            # Check for code block end (```) while in a code block
-            if state.in_code_block and self._is_code_block_end(cleaned_line):
-                if state.current_file:
+        # Check for explicit end marker (===END_FILE===)
+        if stripped == FILE_END_MARKER and state.current_file:
+            self._save_file_from_state(state)
+            state.in_raw_mode = False
+            return
+
+        # Check for ===FILE: marker (explicit file format, no code block needed)
+        if stripped.startswith(FILE_START_MARKER) and stripped.endswith("==="):
+            filepath = stripped[len(FILE_START_MARKER):-3].strip()
+            if filepath:
+                # Save previous file if exists
+                if state.current_file and state.file_content:
                     self._save_file_from_state(state)
+                state.current_file = filepath
+                state.file_content = []
                 state.in_code_block = False
-                return
+                state.in_raw_mode = True  # Using raw ===FILE:=== format
+            return
 
-            # Check for code block start (```)
-            if stripped.startswith("```") and not state.in_code_block:
-                state.in_code_block = True
+        # If in raw mode (===FILE:=== format), accumulate everything until ===END_FILE===
+        if state.in_raw_mode and state.current_file:
+            state.file_content.append(cleaned_line)
+            return
 
-                # Try to extract file path from code block line
-                filepath = self._extract_filepath(cleaned_line)
-                if filepath:
-                    # Save previous file if exists
-                    if state.current_file and state.file_content:
-                        self._save_file_from_state(state)
-                    state.current_file = filepath
-                    state.file_content = []
-                elif state.pending_file:
-                    # Use pending file path
-                    if state.current_file and state.file_content:
-                        self._save_file_from_state(state)
-                    state.current_file = state.pending_file
-                    state.file_content = []
-                    state.pending_file = None
+        # Check for code block end (```) while in a code block
+        if state.in_code_block and stripped == "```":
+            if state.current_file:
+                self._save_file_from_state(state)
+            state.in_code_block = False
+            return
+
+        # Check for code block start (```)
+        if stripped.startswith("```") and not state.in_code_block:
+            state.in_code_block = True
+
+            # Try to extract file path from code block line
+            filepath = self._extract_filepath(stripped)
+            if filepath:
+                # Save previous file if exists
+                if state.current_file and state.file_content:
+                    self._save_file_from_state(state)
+                state.current_file = filepath
+                state.file_content = []
+            elif state.pending_file:
+                # Use pending file path
+                if state.current_file and state.file_content:
+                    self._save_file_from_state(state)
+                state.current_file = state.pending_file
+                state.file_content = []
+                state.pending_file = None
+            return
+
+        # Try to extract file path from non-code-block line (for markdown formats)
+        if not state.in_code_block and not state.current_file:
+            filepath = self._extract_filepath(stripped)
+            if filepath:
+                # Store as pending, will be used when code block starts
+                state.pending_file = filepath
                 return
 
-            # Try to extract file path from non-code-block line (for markdown formats)
-            if not state.in_code_block and not state.current_file:
-                filepath = self._extract_filepath(cleaned_line)
-                if filepath:
-                    # Store as pending, will be used when code block starts
-                    state.pending_file = filepath
-                    return
-
-            # Accumulate content if we have a current file in code block mode
-            if state.in_code_block and state.current_file is not None:
-                state.file_content.append(cleaned_line)
-            else:
-                # Store non-file content in buffer
-                self.buffer.append(cleaned_line)
+        # Accumulate content if we have a current file in code block mode
+        if state.in_code_block and state.current_file is not None:
+            state.file_content.append(cleaned_line)
+        else:
+            # Store non-file content in buffer
+            self.buffer.append(cleaned_line)
 
     def _sanitize_requirements_txt(self, content: str) -> str:
         """Remove built-in Python modules from requirements.txt content."""
-        # Python built-in modules that should NOT be in requirements.txt
-        builtin_modules = {
-            'sqlite3', 'os', 'sys', 'json', 're', 'math', 'datetime', 'time',
-            'random', 'collections', 'itertools', 'functools', 'operator',
-            'string', 'io', 'pathlib', 'typing', 'abc', 'enum', 'dataclasses',
-            'copy', 'pickle', 'shelve', 'dbm', 'csv', 'configparser', 'argparse',
-            'logging', 'warnings', 'traceback', 'unittest', 'doctest', 'pdb',
-            'threading', 'multiprocessing', 'subprocess', 'socket', 'ssl',
-            'email', 'html', 'xml', 'urllib', 'http', 'ftplib', 'smtplib',
-            'uuid', 'hashlib', 'hmac', 'secrets', 'base64', 'binascii',
-            'struct', 'codecs', 'locale', 'gettext', 'unicodedata',
-            'tempfile', 'shutil', 'glob', 'fnmatch', 'linecache', 'stat',
-            'fileinput', 'contextlib', 'weakref', 'types', 'gc', 'inspect',
-            'dis', 'ast', 'ctypes', 'concurrent', 'asyncio', 'queue', 'heapq',
-        }
-
         lines = content.split('\n')
         filtered_lines = []
         for line in lines:
@@ -358,8 +517,8 @@ class StreamingFileSaver:
                 filtered_lines.append(line)
                 continue
             # Extract package name (before ==, >=, <=, [, etc.)
-            pkg_name = re.split(r'[=<>\[\s]', stripped)[0].lower()
-            if pkg_name not in builtin_modules:
+            pkg_name = _PACKAGE_NAME_END_RE.split(stripped, maxsplit=1)[0].lower()
+            if pkg_name not in _BUILTIN_MODULES:
                 filtered_lines.append(line)
 
         return '\n'.join(filtered_lines)
@@ -536,9 +695,10 @@ class StreamingFileSaver:
         with self._lock:
             # Save incomplete files from all agent states
             for agent_name, state in self._agent_states.items():
-                if state.current_file and state.file_content:
-                    self._save_file_from_state(state)
-                state.in_raw_mode = False
-                state.in_code_block = False
+                with state.lock:
+                    if state.current_file and state.file_content:
+                        self._save_file_from_state(state)
+                    state.in_raw_mode = False
+                    state.in_code_block = False
             # Clear all agent states
             self._agent_states.clear()
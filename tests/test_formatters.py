@@ -0,0 +1,69 @@
+"""Regression tests for src.utils.formatters."""
+import os
+
+import pytest
+
+from src.utils.formatters import fix_js_indentation, fix_python_indentation
+
+
+def test_python_keeps_unicode_line_separator_in_string_literal():
+    content = 'def f():\n    return "a\u2028b"\n'
+    fixed = fix_python_indentation(content)
+    assert fixed == content
+    compile(fixed, "<fixed>", "exec")
+
+
+def test_python_keeps_form_feed_in_string_literal():
+    content = 'x = "a\x0cb"\n'
+    assert fix_python_indentation(content) == content
+
+
+def test_js_keeps_unicode_line_separator_in_string_literal():
+    content = 'const s = "a\u2028b";\n'
+    assert fix_js_indentation(content) == content
+
+
+def test_python_normalizes_crlf_and_cr_line_endings():
+    assert fix_python_indentation('a = 1\r\nb = 2\r') == 'a = 1\nb = 2\n'
+
+
+def test_black_in_process_uses_project_config_and_stub_mode(tmp_path):
+    pytest.importorskip("black")
+    from src.utils.formatters import _format_with_black, clear_caches
+
+    clear_caches()
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.black]\nline-length = 40\nskip-string-normalization = true\n'
+    )
+    source = "x = {'alpha': 1, 'beta': 2, 'gamma': 3, 'delta': 4}\n"
+    assert _format_with_black(source, tmp_path / "a.py") == (
+        "x = {\n    'alpha': 1,\n    'beta': 2,\n    'gamma': 3,\n    'delta': 4,\n}\n"
+    )
+    stub = "def f(): ...\nclass A: ...\n"
+    assert _format_with_black(stub, tmp_path / "a.pyi") == "def f(): ...\n\nclass A: ...\n"
+
+
+def test_same_size_rewrite_with_same_mtime_is_formatted_again(tmp_path):
+    from src.utils.formatters import _is_formatted, _mark_formatted, clear_caches
+
+    clear_caches()
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n")
+    stat = path.stat()
+    _mark_formatted(path)
+    assert _is_formatted(path)
+
+    path.write_text("y = 2\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert not _is_formatted(path)
+
+
+def test_atomic_write_removes_temp_file_when_write_fails(tmp_path):
+    from src.utils.formatters import _atomic_write_text
+
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n")
+    with pytest.raises(UnicodeEncodeError):
+        _atomic_write_text(path, "bad \ud800 surrogate\n")
+    assert [p.name for p in tmp_path.iterdir()] == ["a.py"]
+    assert path.read_text() == "x = 1\n"
@@ -0,0 +1,26 @@
+"""Tests for CLI command resolution in src.core.llm."""
+from types import SimpleNamespace
+
+from src.core import llm
+
+
+def test_resolve_cli_unquotes_windows_cmd_path_with_spaces(monkeypatch):
+    path = r"C:\Program Files\nodejs\qwen.cmd"
+    looked_up = []
+
+    def which(name):
+        looked_up.append(name)
+        return name
+
+    # Only llm sees Windows; patching os.name globally breaks pathlib
+    monkeypatch.setattr(llm, "os", SimpleNamespace(name="nt"))
+    monkeypatch.setattr(llm.shutil, "which", which)
+    args = llm._resolve_cli(f'"{path}" --yolo')
+
+    assert looked_up == [path]
+    assert args == ["cmd", "/c", path, "--yolo"]
+
+
+def test_resolve_cli_posix_splits_quoted_arguments():
+    args = llm._resolve_cli("qwen-not-on-path --prompt 'a b'")
+    assert args == ["qwen-not-on-path", "--prompt", "a b"]
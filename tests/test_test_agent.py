@@ -0,0 +1,35 @@
+"""Tests for tech stack detection in src.agents.test."""
+import pytest
+
+import src.core  # noqa: F401  (src.agents imports src.core first; circular otherwise)
+from config.settings import BACKEND_STACKS, FRONTEND_STACKS
+from src.agents.test import (
+    BACKEND_TEST_FRAMEWORKS,
+    FRONTEND_TEST_FRAMEWORKS,
+    _detect_stack,
+)
+
+
+@pytest.mark.parametrize("key", BACKEND_STACKS)
+def test_detects_every_configured_backend_label(key):
+    assert key in BACKEND_TEST_FRAMEWORKS
+    assert _detect_stack(f"Backend: {BACKEND_STACKS[key]['name']}")[0] == key
+
+
+@pytest.mark.parametrize("key", FRONTEND_STACKS)
+def test_detects_every_configured_frontend_label(key):
+    assert key in FRONTEND_TEST_FRAMEWORKS
+    assert _detect_stack(f"Frontend: {FRONTEND_STACKS[key]['name']}")[1] == key
+
+
+def test_detects_labels_in_a_stack_line():
+    assert _detect_stack("Backend: Gin (Go), Frontend: Angular") == ("gin", "angular")
+
+
+def test_detects_manifest_dependency_keys():
+    assert _detect_stack('{"express": "^4.18", "react": "^18.2"}') == ("express", "react")
+
+
+def test_ignores_framework_names_used_as_english_words():
+    spec = "Users can express interest; in spring we react to events. Next, a svelte design."
+    assert _detect_stack(spec) == (None, None)